@@ -7,9 +7,19 @@ Sensor Validity Program; Checks existence, time length, sample rate, and value r
 """
 
 import idelib
+import numpy as np
 from functools import singledispatch
-from collections import defaultdict
-from defvalues import defRates
+from defvalues import getDefRate
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; without it the block scan is plain NumPy
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+# Block metadata arrays of each session checked, keyed by id(sesh); the session is stored with its
+# arrays so a reused id is never mistaken for it
+_blocksCache = {}
 
 
 def checkIde(fileread, expectedVals, blocksOutput=None):
@@ -22,58 +32,86 @@ def checkIde(fileread, expectedVals, blocksOutput=None):
 
     with idelib.importFile(fileread) as ds:
 
-        checkIde.problems = defaultdict(list)
+        checkIde.problems = {}
 
         # BEGIN LENGTH PROCESS
-        duration = getLengthInterval(ds.channels.values())
+        duration, intervals = getLengthInterval(ds.channels.values())
+
+        try:
+            for ch in ds.channels.values():
+                checkIde.problems.update(checkChannel(ch, expectedVals, duration, intervals, blocksOutput))
+        finally:
+            _blocksCache.clear()  # the sessions are released with the dataset
+
+    # Channel IDs are only stringified for the final report
+    return len(checkIde.problems) == 0, {str(k): v for k, v in checkIde.problems.items()}
+
 
-        for ch in ds.channels.values():
-            sesh = ch.getSession()
-            if sesh:  # CHANNEL'S EXISTENCE SUCCEEDS
-                # Determine if a comparison rate is given
-                compRate = None
-                if str(ch.id) in expectedVals and "sample_rate" in expectedVals[str(ch.id)]:
-                    compRate = expectedVals[str(ch.id)]["sample_rate"]
-                elif str(ch.id) in defRates or compRate:
-                    compRate = defRates[str(ch.id)]
+def checkChannel(ch, expectedVals, duration, intervals, blocksOutput=None):
+    """Run the existence, sample rate, duration, and value range tests on one channel
+    :param ch: idelib.dataset.Channel
+    :param expectedVals: dict of {channel id: dict of ranges, sample rate}
+    :param duration: tuple (minimum allowed start time, minimum allowed end time)
+    :param intervals: dict {channel id (int): tuple (channel start time, channel end time)}
+    :param blocksOutput: None, str (output file path for block failures)
+    :return: dict of {channel id (int): list of errors} (empty if the channel passes)
+    """
+    problems = {}
+    cid = str(ch.id)
+    sesh = ch.getSession()
+    if sesh:  # CHANNEL'S EXISTENCE SUCCEEDS
+        ev = expectedVals.get(cid)
+        compRate = resolveRate(cid, ev)
+
+        checkRate(sesh, ch.id, problems, compRate, blocksOutput)  # SAMPLE RATE TEST
+        checkDuration(duration[0], duration[1], *intervals[ch.id], ch.id, problems)  # LENGTH
 
-                checkRate(sesh, ch.id, checkIde.problems, compRate, blocksOutput)  # SAMPLE RATE TEST
-                checkDuration(duration[0], duration[1], sesh, checkIde.problems)  # LENGTH
+        # VALUE RANGE
+        rg = ev.get("range") if ev else None
+        if rg is not None:
+            rangeCheck(rg, ch, problems)
 
-                # VALUE RANGE
-                if str(ch.id) in expectedVals:
-                    if "range" in expectedVals[str(ch.id)]:
-                        rangeCheck(expectedVals[str(ch.id)]["range"], ch, checkIde.problems)
+    else:  # EXISTENCE FAILS
+        problems[ch.id] = ["NO DATA EXISTS"]
 
-            else:  # EXISTENCE FAILS
-                checkIde.problems[str(ch.id)] = ["NO DATA EXISTS"]
+    return problems
 
-    return len(checkIde.problems) == 0, dict(checkIde.problems)
+
+def resolveRate(cid, ev):
+    """Determine the rate to compare a channel's blocks to
+    :param cid: str (channel ID#)
+    :param ev: None or dict of the channel's expected ranges, sample rate
+    :return: None, int (a sample rate to compare blocks to), or function (a separate rate checking function)
+    """
+    compRate = ev.get("sample_rate") if ev else None
+    return getDefRate(cid) if compRate is None else compRate
 
 
-def checkDuration(startMax, endMax, sesh, problems):
+def checkDuration(startMax, endMax, chStart, chEnd, chId, problems):
     """Considers if the channel duration is appropriate
     :param startMax: int (minimum channel start time + 5 seconds)
     :param endMax: int (minimum channel end time + 5 seconds)
-    :param sesh: idelib.dataset.EventArray (channel session)
-    :param problems: dict {channel id: list of errors}
+    :param chStart: int (channel start time)
+    :param chEnd: int (channel end time)
+    :param chId: int (channel ID#)
+    :param problems: dict {channel id (int): list of errors}
     """
     timeErrors = []
-    if sesh.getInterval()[0] > startMax:
-        timeErrors.append(f"Start Time {sesh.getInterval()[0]} should be < {startMax}")
+    if chStart > startMax:
+        timeErrors.append(f"Start Time {chStart} should be < {startMax}")
 
-    if sesh.getInterval()[1] > endMax:
-        timeErrors.append(f"End Time {sesh.getInterval()[1]} should be < {endMax}")
+    if chEnd > endMax:
+        timeErrors.append(f"End Time {chEnd} should be < {endMax}")
 
     if timeErrors:
-        problems[str(sesh._data[0].channelID)].append(("DURATION FAILURE: \n", {timeErrors}))
+        addProblem(problems, chId, ("DURATION FAILURE", tuple(timeErrors)))
 
 
 def checkRate(sesh, chId, problems, compRate, blocksOutput=None):
     """Considers if the sample rate of each block within 1% of the channel's average sample rate
     :param sesh: idelib.dataset.EventArray (channel session)
     :param chId: int (channel ID#)
-    :param problems: dict {channel id: list of errors}
+    :param problems: dict {channel id (int): list of errors}
     :param compRate: None, int (a sample rate to compare blocks to), or function (a separate rate checking function)
     :param blocksOutput: None, str (output file path for block fails)
     """
@@ -82,90 +120,124 @@ def checkRate(sesh, chId, problems, compRate, blocksOutput=None):
         compRate(sesh, chId, problems)
         return
 
-    if len(sesh._data) > 1 and chId != 36:
+    ns, st, et = blockArrays(sesh)
+    RATE_HANDLERS.get(chId, checkBlockRates)(sesh, ns, st, et, chId, problems, compRate, blocksOutput)
+
+
+def checkBlockRates(sesh, ns, st, et, chId, problems, compRate, blocksOutput=None):
+    """Considers if the sample rate of each block is within 1% of the comparison rate (all but Ch36)
+    :param sesh: idelib.dataset.EventArray (channel session)
+    :param ns: numpy.ndarray (number of samples in each block)
+    :param st: numpy.ndarray (start time of each block)
+    :param et: numpy.ndarray (end time of each block)
+    :param chId: int (channel ID#)
+    :param problems: dict {channel id (int): list of errors}
+    :param compRate: None or int (a sample rate to compare blocks to)
+    :param blocksOutput: None, str (output file path for block fails)
+    """
+    if len(ns) > 1:
         if not compRate:  # compRate will be the average channel sample rate
-            compRate = getRate((len(sesh) - sesh._data[0].numSamples - sesh._data[-1].numSamples),
-                               sesh._data[-2].endTime, sesh._data[1].startTime)
-        end = len(sesh._data) - 1
-    elif len(sesh._data) == 1 and compRate:
+            compRate = getRate((len(sesh) - ns[0] - ns[-1]), et[-2], st[1])
+        end = len(ns) - 1
+    elif len(ns) == 1 and compRate:
         end = 1
-    elif chId != 36:  # 1 block & no comparison rate
+    else:  # 1 block & no comparison rate
         return
 
-    if chId != 36:
-        blockFails = {}  # dict of << failing block#, str of block rate >>
+    rates, diffs, failMask, pairDiffs = scanBlocks(ns, st, et, compRate, end)
 
-        for i in range(0, end):  # through 1-2nd to last blocks only
-            bkRate = getRate(sesh._data[i].numSamples, sesh._data[i].endTime, sesh._data[i].startTime)
-            diffToComp = getDiff(bkRate, compRate)
+    blockFails = {}  # dict of << failing block#, str of block rate >>
+    for i in np.flatnonzero(failMask):
+        blockFails[f"{i}"] = f"{rates[i]:.3f} Hz, {(diffs[i] * 100):.3f}%"
 
-            if diffToComp > 0.01 and i != 0:
-                blockFails[f"{i}"] = f"{bkRate:.3f} Hz, {(diffToComp * 100):.3f}%"
-            elif diffToComp > 0.035:
-                blockFails[f"{i}"] = f"{bkRate:.3f} Hz, {(diffToComp * 100):.3f}%"
+    if blockFails and not blocksOutput:
+        addProblem(problems, chId, (f"SAMPLE RATE FAIlURE: Expected: {compRate:.3f}Hz", blockFails))
+    elif blockFails and blocksOutput:
+        addProblem(problems, chId, (f"SAMPLE RATE FAIlURE:", f"Open {blocksOutput}"))
+        outfileBlocks(blockFails, chId, blocksOutput)
 
-        if blockFails and not blocksOutput:
-            problems[str(chId)].append((f"SAMPLE RATE FAIlURE: Expected: {compRate:.3f}Hz", blockFails))
-        elif blockFails and blocksOutput:
-            problems[str(chId)].append((f"SAMPLE RATE FAIlURE:", f"Open {blocksOutput}"))
-            outfileBlocks(blockFails, chId, blocksOutput)
+    checkMissingBlock(pairDiffs, chId, problems, failMask)
 
-        checkMissingBlock(sesh._data, compRate, chId, problems, blockFails)
 
-    else:  # Ch36
-        avgRate = getRate((len(sesh) - sesh._data[0].numSamples - sesh._data[-1].numSamples),
-                          sesh._data[-2].endTime, sesh._data[1].startTime)
-        diffToComp = getDiff(avgRate, compRate)  # compare avg to 1 Hz
-        if diffToComp > 0.01:
-            problems[str(chId)].append((f"SAMPLE RATE FAILURE: Expected: {compRate:.3f} Hz, ",
-                                       f"Actual: {compRate:.3f} Hz (Diff of {diffToComp:.3f})"))
-        checkMissingBlock(sesh._data, compRate, chId, problems)
+def checkCh36Rate(sesh, ns, st, et, chId, problems, compRate, blocksOutput=None):
+    """Considers if the average sample rate of Ch36 is within 1% of the comparison rate
+    :param sesh: idelib.dataset.EventArray (channel session)
+    :param ns: numpy.ndarray (number of samples in each block)
+    :param st: numpy.ndarray (start time of each block)
+    :param et: numpy.ndarray (end time of each block)
+    :param chId: int (channel ID#)
+    :param problems: dict {channel id (int): list of errors}
+    :param compRate: int (a sample rate to compare the average to)
+    :param blocksOutput: None, str (unused; Ch36 blocks are not checked individually)
+    """
+    avgRate = getRate((len(sesh) - ns[0] - ns[-1]), et[-2], st[1])
+    diffToComp = getDiff(avgRate, compRate)  # compare avg to 1 Hz
+    if diffToComp > 0.01:
+        addProblem(problems, chId, (f"SAMPLE RATE FAILURE: Expected: {compRate:.3f} Hz, ",
+                                    f"Actual: {compRate:.3f} Hz (Diff of {diffToComp:.3f})"))
+    # The first set of two blocks is not checked for Ch36
+    checkMissingBlock(getDiff(getPairRate(ns, st, et), compRate)[1:], chId, problems, offset=1)
+
+
+# Channels whose rates are checked differently; all others use checkBlockRates
+RATE_HANDLERS = {36: checkCh36Rate}
 
 
-def checkMissingBlock(seshData, compRate, chId, problems, blockFails=()):
+def checkMissingBlock(pairDiffs, chId, problems, blockFails=None, offset=0):
     """Check if a block of data has been skipped
-    :param seshData: list (channel blocks list)
-    :param compRate: int (sample rate tp compare to)
+    :param pairDiffs: numpy.ndarray (percent diff of each set of two blocks' rate to the comparison rate)
     :param chId: number of channel
-    :param problems: dict {channel id: list of errors}
-    :param blockFails: dict {failing blocks: rates}
+    :param problems: dict {channel id (int): list of errors}
+    :param blockFails: None or numpy.ndarray (mask of blocks already failing the rate test)
+    :param offset: int (block number of the first set of two blocks in pairDiffs)
     """
 
-    missingBlocks = []
-    timeDiffs = []
-    for i in range(int(chId == 36), len(seshData) - 2):  # comparing sets of two blocks
+    missingMask = pairDiffs > 0.03
+    if blockFails is not None:
+        missingMask &= ~blockFails[offset:offset + len(missingMask)]
 
-        rate = getRate(seshData[i].numSamples + seshData[i + 1].numSamples, seshData[i + 1].endTime,
-                       seshData[i].startTime)
-        diff = getDiff(rate, compRate)
-        if diff > 0.03:
-            if str(i) not in blockFails:
-                missingBlocks.append(
-                    f'BLOCK MISSING AT {i} - {i}-{i + 1} Rate is {(diff * 100):.3f}% of Avg.')
-        timeDiffs.append(seshData[i + 1].startTime - seshData[i].endTime)
+    missingBlocks = [f'BLOCK MISSING AT {i} - {i}-{i + 1} Rate is {(diff * 100):.3f}% of Avg.'
+                     for i, diff in zip(np.flatnonzero(missingMask) + offset, pairDiffs[missingMask])]
 
     if missingBlocks:
-        problems[str(chId)].append(("SAMPLE RATE FAILURE: ", missingBlocks))
+        addProblem(problems, chId, ("SAMPLE RATE FAILURE: ", missingBlocks))
+
+
+def blockArrays(sesh):
+    """Extract the per-block sample counts and times as arrays, reading each session's blocks only once
+    :param sesh: idelib.dataset.EventArray (channel session)
+    :return: tuple of numpy.ndarray (number of samples, start times, end times)
+    """
+    cached = _blocksCache.get(id(sesh))
+    if cached is not None and cached[0] is sesh:
+        return cached[1]
+
+    # idelib only exposes blocks as objects, so read all three attributes in one walk over them
+    meta = np.array([(b.numSamples, b.startTime, b.endTime) for b in sesh._data], dtype=np.int64)
+    arrays = tuple(meta.reshape(-1, 3).T.copy())
+    _blocksCache[id(sesh)] = (sesh, arrays)
+    return arrays
 
 
 def getLengthInterval(channels):
     """Find the maximum allowed start and end time
     :param channels: idelib.dataset
-    :return: tuple (minimum allowed start time, minimum allowed end time)
+    :return: tuple (minimum allowed start time, minimum allowed end time),
+        dict {channel id (int): tuple (channel start time, channel end time)}
     """
-    # BEGIN LENGTH PROCESS BY STORING ALL CHANNELS STARTS AND ENDS
-    endTimes = []
-    startTimes = []
+    # BEGIN LENGTH PROCESS BY FINDING THE EARLIEST START AND END OF ALL CHANNELS
+    startMin = endMin = float('inf')
+    intervals = {}
 
-    # get the starts and ends of all
     for ch in channels:
         sesh = ch.getSession()
         if sesh:
-            endTimes.append(sesh.getInterval()[1])
-            startTimes.append(sesh.getInterval()[0])
+            intervals[ch.id] = start, end = sesh.getInterval()
+            startMin = min(startMin, start)
+            endMin = min(endMin, end)
 
     # DETERMINE 5 SECONDS FROM START AND END FOR LENGTH TEST
-    return min(startTimes) + 5e+6, min(endTimes) + 5e+6
+    return (startMin + 5e+6, endMin + 5e+6), intervals
 
 
 @singledispatch
@@ -173,16 +245,17 @@ def rangeCheck(rg, ch, problems):
     """Check the specific ranges in the list/tuple against the appropriate sub channel
     :param rg: list or tuple with channel's value range
     :param ch: idelib.dataset (channel)
-    :param problems: dict {channel ID: list of errors}
+    :param problems: dict {channel ID (int): list of errors}
     """
     failedSubs = {}
 
     for sch in ch.subchannels:
-        if sch.getSession().getMin()[1] < rg[0] or sch.getSession().getMax()[1] > rg[1]:
-            failedSubs[str(sch.id)] = f"Actual Range: " \
-                                      f"({sch.getSession().getMin()[1]}, {sch.getSession().getMax()[1]})"
+        schSesh = sch.getSession()
+        schMin, schMax = schSesh.getMin()[1], schSesh.getMax()[1]
+        if schMin < rg[0] or schMax > rg[1]:
+            failedSubs[str(sch.id)] = f"Actual Range: ({schMin}, {schMax})"
     if failedSubs:
-        problems[str(ch.id)].append((f"VALUE FAILURE: Expected Range: {rg}", failedSubs))
+        addProblem(problems, ch.id, (f"VALUE FAILURE: Expected Range: {rg}", failedSubs))
 
 
 @rangeCheck.register(dict)
@@ -190,17 +263,27 @@ def _(rangeDict, ch, problems):
     """Check the specific ranges in the dict against the appropriate sub channel
     :param rangeDict: dict {sub channel: list or tuple of range}
     :param ch: idelib.dataset (channel)
-    :param problems: dict {channel id: list of errors}
+    :param problems: dict {channel id (int): list of errors}
     """
     failedSubs = {}
 
     for schKey, rg in rangeDict.items():
         sch = ch.getSubChannel(int(schKey)).getSession()
-        if sch.getMin()[1] < rg[0] or sch.getMax()[1] > rg[1]:
-            failedSubs[str(schKey)] = f"Expected Range: {rg}, Actual Range: ({sch.getMin()[1]}, {sch.getMax()[1]})"
+        schMin, schMax = sch.getMin()[1], sch.getMax()[1]
+        if schMin < rg[0] or schMax > rg[1]:
+            failedSubs[str(schKey)] = f"Expected Range: {rg}, Actual Range: ({schMin}, {schMax})"
 
     if failedSubs:
-        problems[str(ch.id)].append(("VALUE RANGE FAILURE", failedSubs))
+        addProblem(problems, ch.id, ("VALUE RANGE FAILURE", failedSubs))
+
+
+def addProblem(problems, chId, error):
+    """Record an error for a channel, creating its list on the first failure
+    :param problems: dict {channel id (int): list of errors}
+    :param chId: int (channel ID)
+    :param error: tuple (failure description, details)
+    """
+    problems.setdefault(chId, []).append(error)
 
 
 def outfileBlocks(fails, chId, file):
@@ -209,28 +292,62 @@ def outfileBlocks(fails, chId, file):
     :param chId: int (channel ID)
     :param file: str of file to print to
     """
-
-    with open(file, "+a") as outfile:
-        outfile.write(f"\nChannel {chId} Block Failures:\n")
-        for block, val in fails.items():
-            outfile.write(f"{block}: {val}\n")
+    lines = "".join(f"{block}: {val}\n" for block, val in fails.items())
+    with open(file, "+a") as outfile:  # only created once a channel has block failures
+        outfile.write(f"\nChannel {chId} Block Failures:\n{lines}")
 
 
+@njit(cache=True)
 def getDiff(rateOf, rateTo):
     """Find percent diff between two rates
-    :param rateOf: int sample rate
+    :param rateOf: int or numpy.ndarray sample rate(s)
     :param rateTo: int sample rate
-    :return: int (percent difference between the two rates)
+    :return: int or numpy.ndarray (percent difference between the two rates)
+    """
+    return np.abs((rateOf - rateTo) / rateTo)
+
+
+@njit(cache=True)
+def scanBlocks(ns, st, et, compRate, end):
+    """Find the rate of each block and set of two blocks in a single pass, and which blocks fail
+    :param ns: numpy.ndarray (number of samples in each block)
+    :param st: numpy.ndarray (start time of each block)
+    :param et: numpy.ndarray (end time of each block)
+    :param compRate: int (sample rate to compare to)
+    :param end: int (number of blocks to check the rates of)
+    :return: tuple of numpy.ndarray (block rates, block diffs, block fail mask, two-block diffs)
+    """
+    rates = getRate(ns[:end], et[:end], st[:end])
+    diffs = getDiff(rates, compRate)
+    pairDiffs = getDiff(getPairRate(ns, st, et), compRate)
+
+    # The first block is allowed more slop than the rest
+    failMask = diffs > 0.01
+    failMask[0] = diffs[0] > 0.035
+
+    return rates, diffs, failMask, pairDiffs
+
+
+@njit(cache=True)
+def getPairRate(ns, st, et):
+    """Find the sample rate of each set of two blocks (through 1-2nd to last blocks only)
+    :param ns: numpy.ndarray (number of samples in each block)
+    :param st: numpy.ndarray (start time of each block)
+    :param et: numpy.ndarray (end time of each block)
+    :return: numpy.ndarray (sample rate of blocks i and i+1)
     """
-    return abs((rateOf - rateTo) / rateTo)
+    # Sample counts of each two-block set come from one running total instead of pairwise sums
+    cumN = np.concatenate((np.zeros(1, ns.dtype), np.cumsum(ns)))
+    return getRate(cumN[2:-1] - cumN[:-3], et[1:-1], st[:-2])
 
 
+@njit(cache=True)
 def getRate(size, end, start):
     """Find sample rate
-    :param size: int (number of samples)
-    :param end: int (end time)
-    :param start: int (start time)
-    :return: int (sample rate)
+    :param size: int or numpy.ndarray (number of samples)
+    :param end: int or numpy.ndarray (end time)
+    :param start: int or numpy.ndarray (start time)
+    :return: int or numpy.ndarray (sample rate)
     """
     return (size - 1) * 1e+6 / (end - start)
 
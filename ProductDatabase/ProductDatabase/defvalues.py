@@ -22,3 +22,6 @@ defRates = {"8": 5000,
             }
 
 defRates = {key: value for key, value in defRates.items() if value}
+
+# Bound once so per-channel lookups skip the attribute lookup
+getDefRate = defRates.get
@@ -8,6 +8,7 @@ have been installed!
 
 from datetime import datetime
 import errno
+from functools import lru_cache
 from glob import glob
 import json
 import os.path
@@ -21,8 +22,10 @@ SETTINGS_FILE = os.path.join(os.path.dirname(__file__), '..', 'ProductDatabase',
 #
 # ===========================================================================
 
+@lru_cache(maxsize=4)
 def findMysqldump(path=MYSQL_PATH):
-    """ Locate the `mysqldump` executable.
+    """ Locate the `mysqldump` executable. The result is cached, so the
+        MySQL Server install directories are only searched once per path.
 
         :param path: The MySQL Server install path.
         :returns: The full path and name of the `mysqldump` executable.
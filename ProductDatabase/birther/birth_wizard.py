@@ -14,12 +14,12 @@ __author__ = "dstokes"
 __copyright__ = "Copyright 2023 Mide Technology Corporation"
 
 import errno
-from functools import partial
+from functools import lru_cache, partial
 import getpass
 from glob import glob
 import json
 import os
-import pprint
+import re
 import shutil
 import string
 import tempfile
@@ -62,7 +62,7 @@ os.environ['DJANGO_SETTINGS_MODULE'] = "ProductDatabase.settings"
 
 import pytz
 import django.db
-from django.db.models import Q
+from django.db import transaction
 from django.utils import timezone
 django.setup()
 
@@ -109,28 +109,73 @@ USER = getpass.getuser()
 
 DEFAULT_CAPACITY = 2
 
+# Translation table removing letters and spaces from the capacity field
+# (e.g. the 'GB' suffix)
+CAPACITY_STRIP_TABLE = str.maketrans('', '', string.ascii_letters + string.whitespace)
+
+# Valid sensor serial number. Deliberately permissive (sensor manufacturers'
+# formats vary); just excludes control characters, e.g. from pasting.
+SENSOR_SN_RE = re.compile(r'[^\x00-\x1f\x7f]+')
+
 uiSchema = ebmlite.loadSchema('mide_config_ui.xml')
 
 # Make this a test birth if the test product path is being used
 TEST_BIRTH = paths.PRODUCT_ROOT_PATH != paths.REAL_PRODUCT_ROOT_PATH
 
+# Previously found calibration files, keyed by chip ID. See `findOldCal()`.
+OLD_CAL_FILES = {}
+
 #===============================================================================
 #
 #===============================================================================
 
 
-def cmp(a, b):
-    """ Workaround for removal of `cmp()` from Python 3. """
-    if a == b:
-        return 0
-    elif a and not b:
-        return -1
-    elif b and not a:
-        return 1
-    if a > b:
-        return 1
-    else:
-        return -1
+def cmpKey(val):
+    """ Sort key function for list columns. Empty values sort after all
+        others (i.e. come last when sorted in ascending order).
+    """
+    return (not val, val)
+
+
+def isDigitOrEmpty(s):
+    """ Validation function for numeric-only text fields. """
+    return not s or s.isdigit()
+
+
+def findOldCal(chipId):
+    """ Find a device's previous calibration file, using `legacy.findOldCal()`.
+        Files that are found are remembered, so checking the same chip ID
+        again doesn't hit the filesystem. Misses aren't remembered, since the
+        file may get created later in the session.
+
+        @param chipId: The device's unique chip ID.
+        @return: The calibration file's path, or `None`.
+    """
+    calFile = OLD_CAL_FILES.get(chipId)
+    if calFile is None:
+        calFile = legacy.findOldCal(chipId)
+        if calFile is not None:
+            OLD_CAL_FILES[chipId] = calFile
+    return calFile
+
+
+@lru_cache(maxsize=64)
+def getBatch(batchId):
+    """ Get the `Batch` with the given ID, creating it if it doesn't exist.
+        Consecutive births usually share a batch, so the results are cached;
+        the `Batch` is only used as a reference (i.e. its primary key).
+
+        @param batchId: The batch ID (string).
+        @return: A `Batch` instance.
+    """
+    try:
+        batch, created = models.Batch.objects.get_or_create(batchId=batchId)
+        if created:
+            logger.info('Created Batch, ID %r' % batchId)
+    except models.Batch.MultipleObjectsReturned:
+        logger.error('More than one Batch with ID %r exists; using last!' % batchId)
+        batch = models.Batch.objects.filter(batchId=batchId).last()
+    return batch
 
 
 #===============================================================================
@@ -236,6 +281,53 @@ class GenericValidator(wx.Validator):
             wx.Bell()
 
 
+class UpperCaseValidator(GenericValidator):
+    """ Variant of `GenericValidator` that converts letters to upper case
+        as they are typed or pasted.
+    """
+
+    def Clone(self):
+        """ Required in wx.PyValidator subclasses. """
+        return UpperCaseValidator(self.isValid, self.maxLen)
+
+
+    def OnChar(self, evt):
+        """ Validate a character that has been typed, entering it as upper
+            case.
+        """
+        key = evt.GetKeyCode()
+
+        # Only ASCII lower case letters are rewritten; WXK_* codes can map
+        # to other lower case characters through chr()
+        if not ord('a') <= key <= ord('z'):
+            return super(UpperCaseValidator, self).OnChar(evt)
+
+        win = self.GetWindow()
+        char = chr(key).upper()
+
+        if self.isValid(char):
+            if self.maxLen is None or len(win.GetValue()) < self.maxLen:
+                win.WriteText(char)
+                return
+
+        if not wx.Validator.IsSilent():
+            wx.Bell()
+
+
+    def OnPaste(self, evt):
+        """ Validate text pasted into the field, entering it as upper case.
+        """
+        win = self.GetWindow()
+        paste = self.getClipboardText().upper()
+        txt = win.GetValue() + paste
+        if self.maxLen is not None:
+            txt = txt[:self.maxLen]
+        if self.isValid(txt):
+            win.WriteText(paste)
+        elif not wx.Validator.IsSilent():
+            wx.Bell()
+
+
 #===============================================================================
 # 
 #===============================================================================
@@ -419,6 +511,13 @@ class BatchAndSNPage(TitledPage):
     """
     DEFAULT_TITLE = "Basic Information"
 
+    # Delay (ms) after the last keystroke before checking the batch ID
+    BATCH_CHECK_DELAY = 75
+
+    # Enclosure type names, and a map of enclosure type to index. Never change.
+    CASE_TYPES = [x[1] for x in models.Device.ENCLOSURE_TYPES]
+    CASE_MAP = {y[0]: x for x, y in enumerate(models.Device.ENCLOSURE_TYPES)}
+
     def getData(self):
         """ Retrieve data from the parent. Called before `buildUI()` and every
             time the page is advanced to.
@@ -429,16 +528,17 @@ class BatchAndSNPage(TitledPage):
         self.newSerialNumber = not self.serialNumber or self.data.newSerialNumber
         self.batchId = self.data.batchId or ""
         self.batches = self.app.batches
+        self.batchSet = frozenset(b.upper() for b in self.batches)  # for fast lookup
         self.orderId = self.data.orderId or ""
         self.orders = self.app.orders
         self.notes = self.data.birthNotes
 
-        self.caseTypes = [x[1] for x in models.Device.ENCLOSURE_TYPES]
-        self.caseMap = {y[0]: x for x, y in enumerate(models.Device.ENCLOSURE_TYPES)}
+        self.caseTypes = self.CASE_TYPES
+        self.caseMap = self.CASE_MAP
         self.enclosure = self.data.enclosure
         
         self.capacity = self.data.capacity
-        self.capacities = [str(c) for c in self.app.prefs.get('capacities', [])]
+        self.capacities = self.app.getCapacities()
     
         if self.data.mcu != self.data.fullMcu:
             self.mcu = "%s (%s)" % (self.data.fullMcu, self.data.mcu)
@@ -460,17 +560,23 @@ class BatchAndSNPage(TitledPage):
         self.data.resetCreationDate = self.resetDateCheck.GetValue()
         
         newSn = self.newSNButton.GetValue()
-        self.data.newSerialNumber = newSn
         if not newSn:
-            self.data.serialNumber = int(self.snField.GetValue().strip())
+            sn = self.snField.GetValue().strip()
+            if not sn.isdecimal():
+                wx.MessageBox("The serial number must be a number!",
+                      "Invalid Serial Number", wx.OK | wx.ICON_ERROR,
+                      self.GetParent())
+                return False
+            self.data.serialNumber = int(sn)
+        self.data.newSerialNumber = newSn
 
         enc = max(self.caseField.GetSelection(), 0)
         self.data.enclosure = models.Device.ENCLOSURE_TYPES[enc][0]
         
-        try:
-            cap = self.capacityField.GetValue()
-            cap = int(cap.strip(string.ascii_letters+string.whitespace))
-        except ValueError:
+        cap = self.capacityField.GetValue().translate(CAPACITY_STRIP_TABLE)
+        if cap.isdecimal():
+            cap = int(cap)
+        else:
             cap = DEFAULT_CAPACITY
             self.capacityField.SetValue(str(cap))
 
@@ -538,7 +644,7 @@ class BatchAndSNPage(TitledPage):
         self.customSNButton.SetSizerProps(valign="center")
         self.snField = wx.TextCtrl(snpane, -1, self.serialNumber)
         self.snField.SetSizerProps(expand=True)
-        self.snField.SetValidator(GenericValidator(lambda x: not x or x.isdigit()))
+        self.snField.SetValidator(GenericValidator(isDigitOrEmpty))
   
         self.sizer.Add(snpane, 0, wx.EXPAND | wx.EAST | wx.WEST, 16)
         
@@ -572,7 +678,7 @@ class BatchAndSNPage(TitledPage):
         wx.StaticText(bpane, -1, 'SD/eMMC Capacity:').SetSizerProps(valign="center")
         self.capacityField = wx.ComboBox(bpane, -1)
         self.capacityField.SetSizerProps(valign="center", expand=True)
-        self.capacityField.SetValidator(GenericValidator(lambda x: not x or x.isdigit()))
+        self.capacityField.SetValidator(GenericValidator(isDigitOrEmpty))
         
         self.sizer.Add(bpane, 0, wx.EXPAND | wx.EAST | wx.WEST, 16)
 
@@ -586,12 +692,15 @@ class BatchAndSNPage(TitledPage):
         wx.StaticText(batchpane, -1, "Batch ID:").SetSizerProps(valign="center")
         self.batchField = wx.ComboBox(batchpane, -1)
         self.batchField.SetSizerProps(valign="center", expand=True)
+        self.batchField.SetValidator(UpperCaseValidator(str.isprintable))
 
         wx.Panel(batchpane, -1)
         self.batchNote = wx.StaticText(batchpane, -1, "Unknown ID: A new Batch will be generated.")
          
         self.sizer.Add(batchpane, 0, wx.EXPAND | wx.EAST | wx.WEST, 16)
 
+        self.batchTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.OnBatchTimer, self.batchTimer)
         self.Bind(wx.EVT_TEXT, self.OnBatchInput, self.batchField)
         
         # Order
@@ -642,7 +751,7 @@ class BatchAndSNPage(TitledPage):
 
         self.birthNotesField.SetValue(self.notes)
         
-        self.batchNote.Show(bool(self.batchId) and self.batchId not in self.batches)
+        self.batchNote.Show(bool(self.batchId) and self.batchId.upper() not in self.batchSet)
 
 
     def OnRadioButton(self, evt):
@@ -656,12 +765,22 @@ class BatchAndSNPage(TitledPage):
     
     
     def OnBatchInput(self, evt):
-        """ Handler for batch field input (selected or typed).
+        """ Handler for batch field input (selected or typed). The batch ID
+            is checked after typing pauses, not on every keystroke.
         """
-        val = evt.GetString().upper()
-        self.batchNote.Show(val != "" and val not in self.batches)
+        self.batchTimer.Start(self.BATCH_CHECK_DELAY, oneShot=True)
         evt.Skip()
 
+
+    def OnBatchTimer(self, _evt):
+        """ Timer event handler, called after batch field input stops.
+        """
+        # Typed text is already upper case; only pre-existing or selected
+        # values might need converting.
+        val = self.batchField.GetValue()
+        self.batchNote.Show(val != "" and val not in self.batchSet
+                            and val.upper() not in self.batchSet)
+
     
     def OnUseExistingDataButton(self, _evt):
         """
@@ -688,6 +807,11 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
     DEFAULT_SORT_COL = COL_PARTNUM
     DEFAULT_SORT_DIR = 1
 
+    # Maximum number of rows measured by `autosizeColumns()`, and the extra
+    # space added to the widest
+    AUTOSIZE_MAX_ROWS = 50
+    AUTOSIZE_PADDING = 12
+
     # Column header sorting indicators
     SmallUpArrow = PyEmbeddedImage(
         "iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAYAAAAf8/9hAAAABHNCSVQICAgIfAhkiAAAA"
@@ -699,6 +823,11 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         "EhJREFUOI1jZGRiZqAEMFGke9QABgYGBgYWdIH///7+J6SJkYmZEacLkCUJacZqAD5DsI"
         "nTLhDRbcPlKrwugGnCFy6Mo3mBAQChDgRlP4RC7wAAAABJRU5ErkJggg==")
 
+    # The decoded bitmaps. These get filled in (as class variables) by
+    # __init__(), since they can't be created before the wx.App exists.
+    upArrowBmp = None
+    dnArrowBmp = None
+
 
     #===========================================================================
     # 
@@ -722,10 +851,12 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         """
         self.sortedCol = self.DEFAULT_SORT_COL
         self.sortDir = self.DEFAULT_SORT_DIR
+        self.lastFilter = None
+        self.sizedItems = frozenset()
         
-        if not hasattr(self, 'upArrowBmp'):
-            self.upArrowBmp = self.SmallUpArrow.GetBitmap()
-            self.dnArrowBmp = self.SmallDnArrow.GetBitmap()
+        if PickExamplePage.upArrowBmp is None:
+            PickExamplePage.upArrowBmp = self.SmallUpArrow.GetBitmap()
+            PickExamplePage.dnArrowBmp = self.SmallDnArrow.GetBitmap()
         
         self.il = wx.ImageList(16, 16)
         self.sortUp = self.il.Add(self.upArrowBmp)
@@ -738,14 +869,27 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         """ Retrieve data from the parent. Called before `buildUI()` and every
             time the page is advanced to.
         """
+        # Data may have changed; force list rebuild
+        self.lastFilter = None
+        self.sizedItems = frozenset()
         self.itemDataMap = {}
         for itemId, (partNumber, name, hwRev, _hasSn, obj) in self.app.examples.items():
+            hwType = obj.device.hwType
+            # The first 5 items are the displayed columns, followed by the
+            # values used for filtering (so `populate()` needn't touch the
+            # database objects), and lastly the example Birth itself.
             self.itemDataMap[itemId] = (
                 partNumber,
                 name,
-                str(obj.device.hwType.mcu),
+                str(hwType.mcu),
                 str(hwRev),
-                str(obj.notes))
+                str(obj.notes),
+                hwType.mcu,
+                hwType.hwRev,
+                hwType.name,
+                obj.serialNumber == obj.RETIRED,
+                obj.serialNumber == obj.PREVIEW,
+                obj)
 
         self.rebirth = self.data.rebirth
         self.selected = self.data.example
@@ -807,12 +951,14 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         self.changeExampleCheck.SetFont(self.changeExampleCheck.GetFont().Bold())
         self.sizer.Add(self.changeExampleCheck, 0, wx.ALL, 8)
         
+        # Not LC_SORT_ASCENDING: rows are appended in `sortItems()` order
         self.list = self.ProductListCtrl(self, -1, size=(600, 400),
-             style=(wx.LC_REPORT | wx.BORDER_SUNKEN | wx.LC_SORT_ASCENDING
+             style=(wx.LC_REPORT | wx.BORDER_SUNKEN
                     | wx.LC_VRULES | wx.LC_HRULES | wx.LC_SINGLE_SEL))
         self.sizer.Add(self.list, 1, wx.EXPAND | wx.ALL, 5)
 
         self.list.SetImageList(self.il, wx.IMAGE_LIST_SMALL)
+        self.buildColumns()
         listmix.ColumnSorterMixin.__init__(self, 5)
         
         self.Bind(wx.EVT_LIST_COL_CLICK, self.OnColClick, self.list)
@@ -906,16 +1052,52 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         return info
 
 
-    def populate(self, sort=True):
-        """ Build out the list of "example" Births.
+    def autosizeColumns(self, *cols):
+        """ Size list columns to fit their contents. The same as setting their
+            widths to `wx.LIST_AUTOSIZE`, but only the first rows (up to
+            `AUTOSIZE_MAX_ROWS`) are measured, all with the same DC.
+
+            @param cols: The indices of the columns to size.
+        """
+        if self.list.GetItemCount() <= self.AUTOSIZE_MAX_ROWS:
+            for col in cols:
+                self.list.SetColumnWidth(col, wx.LIST_AUTOSIZE)
+            return
+
+        dc = wx.ClientDC(self.list)
+        dc.SetFont(self.list.GetFont())
+        getExtent = dc.GetTextExtent
+        getText = self.list.GetItemText
+        rows = range(self.AUTOSIZE_MAX_ROWS)
+
+        # The first column also shows the item images (e.g. checkboxes)
+        il = self.list.GetImageList(wx.IMAGE_LIST_SMALL)
+        if il is not None and il.GetImageCount():
+            imageWidth = il.GetSize(0)[0]
+        else:
+            imageWidth = 0
+
+        for col in cols:
+            width = max(getExtent(getText(i, col))[0] for i in rows)
+            if col == 0:
+                width += imageWidth
+            self.list.SetColumnWidth(col, width + self.AUTOSIZE_PADDING)
+
+
+    def buildColumns(self):
+        """ Create the list's columns. The columns never change, so this is
+            only done once; `populate()` just replaces the items.
         """
-        self.list.ClearAll()
-        
         self.list.InsertColumn(0, self._makeListInfo("Part Number"))
         self.list.InsertColumn(1, self._makeListInfo("Name"))
         self.list.InsertColumn(2, self._makeListInfo("MCU"))
         self.list.InsertColumn(3, self._makeListInfo("HwRev"))
         self.list.InsertColumn(4, self._makeListInfo("Notes"))
+
+
+    def populate(self, sort=True):
+        """ Build out the list of "example" Births.
+        """
         showRev = False
         showType = False
 
@@ -936,93 +1118,119 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         showRetired = self.showRetiredCheck.GetValue()
         showPreview = self.showPreviewCheck.GetValue()
 
-        for itemId, (partNumber, name, mcu, hwRev, notes) in self.itemDataMap.items():
-            obj = self.app.examples[itemId][-1]
+        self.customMsg.Show(self.customCheck.GetValue())
+        self.showRevsRB.Show(self.rebirth)
+        
+        self.showMcuCheck.SetLabelText("%s (%s)" % (self.showMcuText,
+                                                    self.mcu))
+
+        # Don't rebuild the list if the filtering hasn't changed
+        hwType = self.data.device.hwType if self.data.device else None
+        filterKey = (showMcu, showRev, showType, showRetired, showPreview, self.mcu,
+                     hwType and hwType.hwRev, hwType and hwType.name)
+        if filterKey == self.lastFilter:
+            return
+        self.lastFilter = filterKey
+
+        if self.data.device:
+            devRev = self.data.device.hwType.hwRev
+            devType = self.data.device.hwType.name
+        selectedId = self.selected.id if self.selected else None
+
+        rows = {}
+        for itemId, data in self.itemDataMap.items():
+            (partNumber, name, mcuStr, hwRevStr, notes,
+             mcu, hwRev, typeName, retired, preview, _obj) = data
 
-            mcu = obj.device.hwType.mcu 
             if showMcu and mcu != self.mcu:
                 continue
-            
+        
             if self.data.device:
                 if not showRev:
-                    if obj.device.hwType.hwRev != self.data.device.hwType.hwRev:
+                    if hwRev != devRev:
                         continue
                 if not showType:
-                    if obj.device.hwType.name != self.data.device.hwType.name:
+                    if typeName != devType:
                         continue
 
-            if obj.serialNumber == obj.RETIRED:
+            if retired:
                 if not showRetired:
                     continue
                 else:
                     name = f"{name} (RETIRED)"
-            elif obj.serialNumber == obj.PREVIEW:
+            elif preview:
                 if not showPreview:
                     continue
                 else:
                     name = f"{name} (PREVIEW)"
 
-            index = self.list.InsertItem(2**32, partNumber)
-            self.list.SetItem(index, self.COL_NAME, name)
-            self.list.SetItem(index, self.COL_MCU, mcu)
-            self.list.SetItem(index, self.COL_HWREV, hwRev)
-            self.list.SetItem(index, self.COL_NOTES, str(obj.notes))
-            self.list.SetItemData(index, itemId)
-
-            if obj == self.selected:
-                self.list.Select(index)
-                self.list.Focus(index)
-
-        self.list.SetColumnWidth(self.COL_PARTNUM, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(self.COL_NAME, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(self.COL_MCU, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(self.COL_HWREV, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(self.COL_NOTES, 300)
+            rows[itemId] = (partNumber, name, mcuStr, hwRevStr, notes)
 
-        listmix.ColumnSorterMixin.SortListItems(self, self.sortedCol, self.sortDir)
-        
-        self.customMsg.Show(self.customCheck.GetValue())
-        self.showRevsRB.Show(self.rebirth)
-        
-        self.showMcuCheck.SetLabelText("%s (%s)" % (self.showMcuText,
-                                                    self.mcu))
+        # Suspend repainting until the list is completely rebuilt
+        self.list.Freeze()
+        try:
+            self.list.DeleteAllItems()
+
+            # Rows are added in sorted order
+            for itemId in self.sortItems(rows, self.sortedCol, self.sortDir):
+                index = self.list.Append(rows[itemId])
+                self.list.SetItemData(index, itemId)
+
+                if itemId == selectedId:
+                    self.list.Select(index)
+                    self.list.Focus(index)
+
+            # Autosizing measures every row; only do it if there are rows
+            # that haven't been measured before (i.e. a column may need to
+            # get wider).
+            if not self.sizedItems.issuperset(rows):
+                self.sizedItems = self.sizedItems.union(rows)
+                self.list.SetColumnWidth(self.COL_PARTNUM, wx.LIST_AUTOSIZE)
+                self.list.SetColumnWidth(self.COL_NAME, wx.LIST_AUTOSIZE)
+                self.list.SetColumnWidth(self.COL_MCU, wx.LIST_AUTOSIZE)
+                self.list.SetColumnWidth(self.COL_HWREV, wx.LIST_AUTOSIZE)
+                self.list.SetColumnWidth(self.COL_NOTES, 300)
+
+            self.setSortState(self.sortedCol, self.sortDir)
+        finally:
+            self.list.Thaw()
 
     
-    def sorter(self, key1, key2):
-        """ Custom sorter that sorts by part number if sorted column values
-            are equal. If sorting by part number, the hardware revision is 
-            used as the secondary sort criteria.
-        """
-        col = self._col
-        ascending = self._colSortFlag[col]
-        item1 = self.itemDataMap[key1][col]
-        item2 = self.itemDataMap[key2][col]
-
-        cmpVal = cmp(item1, item2)
-
-        if cmpVal == 0:
-            if col != self.COL_HWREV:
-                # If not explicitly sorted by HwRev, HwRev is always shown
-                # in descending order
-                item1 = self.itemDataMap[key1][self.COL_HWREV]
-                item2 = self.itemDataMap[key2][self.COL_HWREV]
-                return -cmp(item1, item2)
-            else:
-                item1 = self.itemDataMap[key1][self.COL_PARTNUM]
-                item2 = self.itemDataMap[key2][self.COL_PARTNUM]
-                
-            cmpVal = cmp(item1, item2)
-        
-        if ascending:
-            return cmpVal
-        else:
-            return -cmpVal
+    def sortItems(self, itemIds, col, ascending):
+        """ Get item IDs in sorted order. If the sorted column values are
+            equal, the hardware revision is used as the secondary sort
+            criteria (always descending). If sorting by hardware revision,
+            the part number is used as the secondary sort criteria.
+
+            @param itemIds: The IDs (`itemDataMap` keys) of the items to sort.
+            @param col: The index of the column to sort by.
+            @param ascending: `True` to sort in ascending order.
+            @return: A list of item IDs.
+        """
+        data = self.itemDataMap
+
+        if col == self.COL_HWREV:
+            return sorted(itemIds, reverse=not ascending,
+                          key=lambda k: (cmpKey(data[k][col]),
+                                         cmpKey(data[k][self.COL_PARTNUM])))
+
+        # Sorts are stable, so sorting by HwRev first makes it the secondary
+        # criteria, unaffected by the direction of the primary sort.
+        order = sorted(itemIds, reverse=True,
+                       key=lambda k: cmpKey(data[k][self.COL_HWREV]))
+        order.sort(reverse=not ascending, key=lambda k: cmpKey(data[k][col]))
+        return order
         
     
     def GetColumnSorter(self):
         """ Used by `ColumnSorterMixin` to get the column sorting function.
+            The items are ranked once up front, so each comparison is just
+            a subtraction.
         """
-        return self.sorter
+        order = self.sortItems(self.itemDataMap, self._col,
+                               self._colSortFlag[self._col])
+        ranks = {itemId: n for n, itemId in enumerate(order)}
+        return lambda key1, key2: ranks[key1] - ranks[key2]
     
     
     def GetNext(self):
@@ -1047,8 +1255,9 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
     
     def OnChangeExampleCheck(self, evt):
         """ Event handler called when the 'change type' checkbox changes.
+            Only enables/disables the controls; the list contents are
+            unaffected.
         """
-        self.populate()
         enable = evt.IsChecked()
         self.list.Enable(enable)
         self.showRevsRB.Enable(enable)
@@ -1065,7 +1274,7 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         if idx == -1:
             return None
         
-        data = self.app.examples.get(self.list.GetItemData(idx), None)
+        data = self.itemDataMap.get(self.list.GetItemData(idx), None)
         if data:
             return data[-1]
     
@@ -1082,6 +1291,19 @@ class PickExamplePage(TitledPage, listmix.ColumnSorterMixin):
         return (self.sortDn, self.sortUp)
     
     
+    def setSortState(self, col, ascending):
+        """ Update `ColumnSorterMixin`'s sort column, direction, and column
+            header image without actually sorting (i.e. the list items were
+            added in already-sorted order by `sortItems()`).
+        """
+        oldCol = self._col
+        self._col = col
+        self._colSortFlag[col] = ascending
+        if oldCol != -1 and oldCol != col:
+            self.list.ClearColumnImage(oldCol)
+        self.list.SetColumnImage(col, self.GetSortImages()[ascending])
+
+
     def OnColClick(self, evt):
         """ Required by `ColumnSorterMixin.`
         """
@@ -1139,6 +1361,9 @@ class SensorSerialNumPage(PickExamplePage):
 
     DEFAULT_SORT_COL = ID_COLUMN
     DEFAULT_SORT_DIR = 1
+
+    # The data the list was last built from (see `populate()`)
+    lastBuilt = None
     
     #===========================================================================
     # 
@@ -1156,57 +1381,6 @@ class SensorSerialNumPage(PickExamplePage):
             listmix.ListCtrlAutoWidthMixin.__init__(self) 
             listmix.TextEditMixin.__init__(self) 
 
-        #     self.Bind(wx.EVT_LIST_ITEM_FOCUSED, self.OnItemSelected)
-        #
-        #
-        # def OnItemSelected(self, evt):
-        #     """ Handle item selection events. Automatically starts editing.
-        #     """
-        #     idx = evt.GetIndex()
-        #     if idx >= 0:
-        #         self.OpenEditor(2, idx)
-        #
-
-        # def OpenEditor(self, col, row):
-        #     """ Start editing a cell.
-        #     """
-        #     self.curRow = row
-        #     self.curCol = col
-        #
-        #     # I shouldn't have to do this, but there's a bug in TextEditMixin,
-        #     # in which it doesn't do this initialization until after a click.
-        #     self.col_locs = [0]
-        #     loc = 0
-        #     for n in range(self.GetColumnCount()):
-        #         loc = loc + self.GetColumnWidth(n)
-        #         self.col_locs.append(loc)
-        #
-        #     super(SensorSerialNumPage.SNListCtrl, self).OpenEditor(col, row)
-        #
-        #
-        # def OnChar(self, evt):
-        #     """ Handle key press event when editing. Does field changing with
-        #         tab and enter.
-        #     """
-        #     key = evt.GetKeyCode()
-        #     if key == wx.WXK_TAB or key == wx.WXK_RETURN:
-        #         if wx.GetKeyState(wx.WXK_SHIFT):
-        #             if self.curRow > 0:
-        #                 self.CloseEditor()
-        #                 self.OpenEditor(self.curCol, self.curRow-1)
-        #                 return
-        #         elif self.curRow < self.GetItemCount()-1:
-        #             self.CloseEditor()
-        #             self.OpenEditor(self.curCol, self.curRow+1)
-        #             return
-        #
-        #     super(SensorSerialNumPage.SNListCtrl, self).OnChar(evt)
-
-    def SetStringItem(self, index, col, data):
-        if col != 2:
-            return
-        wx.ListCtrl.SetItem(self, index, col, data)
-
     #===========================================================================
     # 
     #===========================================================================
@@ -1230,13 +1404,10 @@ class SensorSerialNumPage(PickExamplePage):
         """
         serials = {}
         for i in range(self.list.GetItemCount()):
-            col = self.list.GetItem(i, self.SN_COLUMN)
-            itemId = col.GetData()
-            sn = col.GetText().strip()
-            if not sn:
+            sn = self.list.GetItemText(i, self.SN_COLUMN).strip()
+            if not SENSOR_SN_RE.fullmatch(sn):
                 return False
-            # FUTURE: serial number validation (regex?)
-            serials[itemId] = sn
+            serials[self.list.GetItemData(i)] = sn
 
         self.data.sensorSerials.update(serials)
         return True
@@ -1245,8 +1416,9 @@ class SensorSerialNumPage(PickExamplePage):
     def buildUI(self):
         """ Construct the GUI.
         """
+        # Not LC_SORT_ASCENDING: rows are appended in `sortItems()` order
         self.list = self.SNListCtrl(self, -1, size=(600, 400),
-             style=(wx.LC_REPORT | wx.BORDER_SUNKEN | wx.LC_SORT_ASCENDING
+             style=(wx.LC_REPORT | wx.BORDER_SUNKEN
                     | wx.LC_VRULES | wx.LC_HRULES | wx.LC_SINGLE_SEL 
                     | wx.LC_EDIT_LABELS))
         self.sizer.Add(self.list, 1, wx.EXPAND | wx.ALL, 5)
@@ -1261,26 +1433,41 @@ class SensorSerialNumPage(PickExamplePage):
     def populate(self, sort=True):
         """ Build out the list of Sensors requiring serial numbers.
         """
-        self.list.ClearAll()
+        # Don't rebuild if nothing has changed since the last time (e.g. the
+        # page is being revisited).
+        built = (dict(self.itemDataMap), self.sortedCol, self.sortDir)
+        if built == self.lastBuilt:
+            return
+        self.lastBuilt = built
+
+        # Filter and convert everything before touching the list
+        itemIds = [k for k, v in self.itemDataMap.items()
+                   if "CommunicationWiFi" not in v[0]]
+        rows = []
+        for itemId in self.sortItems(itemIds, self.sortedCol, self.sortDir):
+            name, sensorId, sn, _sensor = self.itemDataMap[itemId]
+            rows.append((itemId, (name, str(sensorId or ""), str(sn or ""))))
+
+        # Suspend repainting until the list is completely rebuilt
+        self.list.Freeze()
+        try:
+            self.list.ClearAll()
         
-        self.list.InsertColumn(self.NAME_COLUMN, self._makeListInfo("Name"))
-        self.list.InsertColumn(self.ID_COLUMN, self._makeListInfo("ID", align=wx.LIST_FORMAT_RIGHT))
-        self.list.InsertColumn(self.SN_COLUMN, self._makeListInfo("Serial Number"))
+            self.list.InsertColumn(self.NAME_COLUMN, self._makeListInfo("Name"))
+            self.list.InsertColumn(self.ID_COLUMN, self._makeListInfo("ID", align=wx.LIST_FORMAT_RIGHT))
+            self.list.InsertColumn(self.SN_COLUMN, self._makeListInfo("Serial Number"))
 
-        for itemId, (name, sensorId, sn, _sensor) in self.itemDataMap.items():
-            if "CommunicationWiFi" in name:
-                continue
-
-            index = self.list.InsertItem(2**32, name)
-            self.list.SetItem(index, self.ID_COLUMN, str(sensorId or ""))
-            self.list.SetItem(index, self.SN_COLUMN, str(sn or ""))
-            self.list.SetItemData(index, itemId)
+            for itemId, row in rows:
+                index = self.list.Append(row)
+                self.list.SetItemData(index, itemId)
             
-        self.list.SetColumnWidth(self.NAME_COLUMN, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(self.ID_COLUMN, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(self.SN_COLUMN, wx.LIST_AUTOSIZE)
+            self.autosizeColumns(self.NAME_COLUMN, self.ID_COLUMN,
+                                 self.SN_COLUMN)
 
-        listmix.ColumnSorterMixin.SortListItems(self, self.sortedCol, self.sortDir)
+            # Items were added in sorted order
+            self.setSortState(self.sortedCol, self.sortDir)
+        finally:
+            self.list.Thaw()
 
         # XXX: Fails in new system
         # if len(self.itemDataMap) > 0:
@@ -1315,40 +1502,27 @@ class SensorSerialNumPage(PickExamplePage):
         evt.Skip()
     
 
-    def sorter(self, key1, key2):
-        """ Custom sorter that sorts by Sensor ID if sorted column values
-            are equal.
-        """
-        col = self._col
-        ascending = self._colSortFlag[col]
-        item1 = self.itemDataMap[key1][col]
-        item2 = self.itemDataMap[key2][col]
-        
-        cmpVal = cmp(item1, item2)
+    def sortItems(self, itemIds, col, ascending):
+        """ Get item IDs in sorted order. If the sorted column values are
+            equal, the Sensor ID is used as the secondary sort criteria
+            (always ascending). If sorting by Sensor ID, the name is used as
+            the secondary sort criteria.
 
-        if cmpVal == 0:
-            if col != self.ID_COLUMN:
-                # If not explicitly sorted by HwRev, HwRev is always shown
-                # in descending order
-                item1 = self.itemDataMap[key1][1]
-                item2 = self.itemDataMap[key2][1]
-                return cmp(item1, item2)
-            else:
-                item1 = self.itemDataMap[key1][0]
-                item2 = self.itemDataMap[key2][0]
-                
-            cmpVal = cmp(item1, item2)
-        
-        if ascending:
-            return cmpVal
-        else:
-            return -cmpVal
-        
-    
-    def GetColumnSorter(self):
-        """ Used by `ColumnSorterMixin` to get the column sorting function.
+            @param itemIds: The IDs (`itemDataMap` keys) of the items to sort.
+            @param col: The index of the column to sort by.
+            @param ascending: `True` to sort in ascending order.
+            @return: A list of item IDs.
         """
-        return self.sorter
+        data = self.itemDataMap
+
+        if col == self.ID_COLUMN:
+            return sorted(itemIds, reverse=not ascending,
+                          key=lambda k: (cmpKey(data[k][col]),
+                                         cmpKey(data[k][self.NAME_COLUMN])))
+
+        order = sorted(itemIds, key=lambda k: cmpKey(data[k][self.ID_COLUMN]))
+        order.sort(reverse=not ascending, key=lambda k: cmpKey(data[k][col]))
+        return order
     
     
     def GetNext(self):
@@ -1378,7 +1552,7 @@ class SensorSerialNumPage(PickExamplePage):
             evt.Skip()
             return
         
-        wx.MessageBox("All sensors require serial numbers", 
+        wx.MessageBox("All sensors require valid serial numbers", 
                       "Invalid Serial Number", wx.OK | wx.ICON_ERROR,
                       self.GetParent())
         evt.Veto()
@@ -1393,6 +1567,9 @@ class DeviceOptionsPage(PickExamplePage):
     """
     DEFAULT_TITLE = "Advanced Options (Hardware and FW)"
 
+    # The data the sensor list was last built from (see `populateList()`)
+    lastBuilt = None
+
     #===========================================================================
     # 
     #===========================================================================
@@ -1418,36 +1595,17 @@ class DeviceOptionsPage(PickExamplePage):
     # 
     #===========================================================================
 
-    def __init__(self, parent, title=None):
-        """ Constructor.
-        """
-        self.sortedCol = self.DEFAULT_SORT_COL
-        self.sortDir = self.DEFAULT_SORT_DIR
-        
-        if not hasattr(self, 'upArrowBmp'):
-            self.upArrowBmp = self.SmallUpArrow.GetBitmap()
-            self.dnArrowBmp = self.SmallDnArrow.GetBitmap()
-        
-        super(DeviceOptionsPage, self).__init__(parent, title)
-
+    def sortItems(self, itemIds, col, ascending):
+        """ Get item IDs in sorted order.
 
-    def sorter(self, key1, key2):
-        """ Custom sorter that sorts by part number if sorted column values
-            are equal. If sorting by part number, the hardware revision is
-            used as the secondary sort criteria.
+            @param itemIds: The IDs (`itemDataMap` keys) of the items to sort.
+            @param col: The index of the column to sort by.
+            @param ascending: `True` to sort in ascending order.
+            @return: A list of item IDs.
         """
-        col = self._col
-        ascending = self._colSortFlag[col]
-        item1 = self.itemDataMap[key1][col]
-        item2 = self.itemDataMap[key2][col]
-
-        cmpVal = cmp(item1, item2)
-
-        if ascending:
-            return cmpVal
-        else:
-            return -cmpVal
-
+        data = self.itemDataMap
+        return sorted(itemIds, reverse=not ascending,
+                      key=lambda k: cmpKey(data[k][col]))
 
 
     def getData(self):
@@ -1456,14 +1614,16 @@ class DeviceOptionsPage(PickExamplePage):
         """
         self.hwTypeMap = self.app.hwTypes
         self.hwTypes = list(self.hwTypeMap.keys())
+        self.hwTypeIndex = {t: i for i, t in enumerate(self.hwTypes)}
         self.selectedType = self.data.hwType
 
         self.batTypeMap = self.app.batteries
         self.batTypes = list(self.batTypeMap.keys())
+        self.batTypeIndex = {b: i for i, b in enumerate(self.batTypes)}
         self.selectedBat = self.data.battery
 
         self.itemDataMap = self.app.digitalSensors
-        self.presentSensors = self.data.getDigitalPeripherals()
+        self.presentSensors = frozenset(self.data.getDigitalPeripherals())
 
 
     def updateData(self):
@@ -1537,8 +1697,9 @@ class DeviceOptionsPage(PickExamplePage):
         """
         self.itemDataMap = {}  # required by ColumnSorterMixin
 
+        # Not LC_SORT_ASCENDING: rows are appended in `sortItems()` order
         self.list = self.CheckListCtrl(self, -1, size=(600, 400),
-             style=(wx.LC_REPORT | wx.BORDER_SUNKEN | wx.LC_SORT_ASCENDING
+             style=(wx.LC_REPORT | wx.BORDER_SUNKEN
                     | wx.LC_VRULES | wx.LC_HRULES | wx.LC_SINGLE_SEL))
         self.sizer.Add(self.list, 1, wx.EXPAND | wx.ALL, 5)
 
@@ -1556,42 +1717,52 @@ class DeviceOptionsPage(PickExamplePage):
     def populateList(self):
         """ Build out the list of digital sensors/peripherals.
         """
-        self.list.ClearAll()
+        # Don't rebuild if nothing has changed since the last time (e.g. the
+        # page is being revisited).
+        built = (dict(self.itemDataMap), self.presentSensors,
+                 self.sortedCol, self.sortDir)
+        if built == self.lastBuilt:
+            return
+        self.lastBuilt = built
+
+        # Suspend repainting until the list is completely rebuilt
+        self.list.Freeze()
+        try:
+            self.list.ClearAll()
         
-        self.list.InsertColumn(0, self._makeListInfo("Part Number"))
-        self.list.InsertColumn(1, self._makeListInfo("Description"))
-        self.list.InsertColumn(2, self._makeListInfo("Manufacturer"))
+            self.list.InsertColumn(0, self._makeListInfo("Part Number"))
+            self.list.InsertColumn(1, self._makeListInfo("Description"))
+            self.list.InsertColumn(2, self._makeListInfo("Manufacturer"))
 
-        for itemId, data in self.itemDataMap.items():
-            name, desc, manufacturer, _sensor = data
+            for itemId in self.sortItems(self.itemDataMap, self.sortedCol, self.sortDir):
+                name, desc, manufacturer, _sensor = self.itemDataMap[itemId]
             
-            index = self.list.InsertItem(2**32, name)
-            self.list.SetItem(index, 1, desc)
-            self.list.SetItem(index, 2, manufacturer)
-            self.list.SetItemData(index, itemId)
+                index = self.list.Append((name, desc, manufacturer))
+                self.list.SetItemData(index, itemId)
 
-            if itemId in self.presentSensors:
-                self.list.CheckItem(index)
+                if itemId in self.presentSensors:
+                    self.list.CheckItem(index)
 
-        self.list.SetColumnWidth(0, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(1, wx.LIST_AUTOSIZE)
-        self.list.SetColumnWidth(2, wx.LIST_AUTOSIZE)
+            self.autosizeColumns(0, 1, 2)
 
-        listmix.ColumnSorterMixin.SortListItems(self, self.sortedCol, self.sortDir)
+            # Items were added in sorted order
+            self.setSortState(self.sortedCol, self.sortDir)
+        finally:
+            self.list.Thaw()
     
     
     def populate(self, sort=True):
         """ Fill out the UI with (current) data from the parent.
         """
         self.hwTypeField.SetItems(self.hwTypes)
-        t = str(self.selectedType)
-        if t in self.hwTypes:
-            self.hwTypeField.SetSelection(self.hwTypes.index(t))
+        idx = self.hwTypeIndex.get(str(self.selectedType))
+        if idx is not None:
+            self.hwTypeField.SetSelection(idx)
         
         self.batteryField.SetItems(self.batTypes)
-        b = str(self.selectedBat)
-        if b in self.batTypes:
-            self.batteryField.SetSelection(self.batTypes.index(b))
+        idx = self.batTypeIndex.get(str(self.selectedBat))
+        if idx is not None:
+            self.batteryField.SetSelection(idx)
 
         self.populateList()
 
@@ -1640,8 +1811,11 @@ class FirmwareWidget(SC.SizedPanel):
         self.actualRev = kwargs.pop('actualRev', None)
         self.filename = kwargs.pop('filename', "")
         
-        startDirectory = kwargs.pop('startDirectory', '')
-        buttonText = kwargs.pop('buttonText', "Browse")
+        # Filenames already found to exist by `validate()`
+        self.validFiles = set()
+        
+        self.startDirectory = kwargs.pop('startDirectory', '')
+        self.buttonText = kwargs.pop('buttonText', "Browse")
         
         super(FirmwareWidget, self).__init__(*args, **kwargs)
         self.SetSizerType("form")
@@ -1661,15 +1835,43 @@ class FirmwareWidget(SC.SizedPanel):
         
         self.fileBtn = wx.RadioButton(self, -1, "Upload File:")
         self.fileBtn.SetSizerProps(valign="center")
-        self.fileField = FB.FileBrowseButtonWithHistory(self, -1,
-            labelText="", buttonText=buttonText, #  fileMask="*.bin",
-            startDirectory=startDirectory, changeCallback=self.OnFilePicked,
-            dialogTitle="Choose a %s file" % self.type)
-        self.fileField.SetSizerProps(valign="center", expand=True)
+        # The file browser is only created if 'Upload File' gets selected
+        # (see `_ensureFileField()`); this holds its place in the sizer.
+        self.fileField = None
+        self._fileFieldPlaceholder = wx.Panel(self, -1)
+        self._fileFieldPlaceholder.SetSizerProps(valign="center", expand=True)
         
         self.Bind(wx.EVT_RADIOBUTTON, self.OnRadioButton)
 
     
+    def _ensureFileField(self):
+        """ Create the file browser, replacing its placeholder, if it hasn't
+            been created already.
+            
+            @return: The file browser widget.
+        """
+        if self.fileField is None:
+            # Note: SizedPanel adds new children to the end of its sizer.
+            field = FB.FileBrowseButtonWithHistory(self, -1,
+                labelText="", buttonText=self.buttonText, #  fileMask="*.bin",
+                startDirectory=self.startDirectory,
+                changeCallback=self.OnFilePicked,
+                dialogTitle="Choose a %s file" % self.type)
+            sizer = self.GetSizer()
+            sizer.Detach(field)
+            sizer.Replace(self._fileFieldPlaceholder, field)
+            self._fileFieldPlaceholder.Destroy()
+            self._fileFieldPlaceholder = None
+            
+            field.SetHistory(self.history)
+            field.SetValue(self.filename, 0)
+            self.fileField = field
+            self.Layout()
+            self.GetParent().Layout()
+        
+        return self.fileField
+
+
     def populate(self, new=None, rev=None, choices=None, filename=None,
                  history=None, lastRev=None, actualRev=None):
         """
@@ -1688,6 +1890,10 @@ class FirmwareWidget(SC.SizedPanel):
         self.rev = rev or self.rev
         self.choices = choices or self.choices
         self.lastRev = lastRev or self.lastRev
+        
+        # `choices` keys (revisions) by list index and vice versa
+        self.revs = list(self.choices)
+        self.revIndex = {r: i for i, r in enumerate(self.revs)}
         self.actualRev = actualRev or self.actualRev
         
         if self.actualRev:
@@ -1699,8 +1905,9 @@ class FirmwareWidget(SC.SizedPanel):
         
         self.previousText.SetLabel(msg)
         
-        self.fileField.SetHistory(self.history)
-        self.fileField.SetValue(self.filename)
+        if self.fileField is not None:
+            self.fileField.SetHistory(self.history)
+            self.fileField.SetValue(self.filename)
         
         self.newField.SetItems(list(self.choices.values()))
         if self.choices:
@@ -1711,20 +1918,21 @@ class FirmwareWidget(SC.SizedPanel):
 
         elif self.rev in self.choices:
             # Known version 
-            idx = list(self.choices.keys()).index(self.rev)
-            self.newField.SetSelection(idx)
+            self.newField.SetSelection(self.revIndex[self.rev])
             self.newBtn.SetValue(True)
         
         if self.new:
             if self.filename:
                 # A specific alternate file to upload
                 self.fileBtn.SetValue(True)
+                self._ensureFileField()
             else:
                 self.newBtn.SetValue(True)
         else:
             self.noChangeBtn.SetValue(True)
         
-        self.fileField.Enable(self.fileBtn.GetValue())
+        if self.fileField is not None:
+            self.fileField.Enable(self.fileBtn.GetValue())
         self.newField.Enable(self.newBtn.GetValue())
         
 
@@ -1732,12 +1940,14 @@ class FirmwareWidget(SC.SizedPanel):
     def validate(self):
         """
         """
-        if self.fileBtn.GetValue() and not os.path.isfile(self.filename):
-            msg = ("The specified %s file could not be found!\n\nFilename: '%s'"
-                   % (self.type, self.filename))
-            wx.MessageBox(msg, "%s File Not Found" % self.type.capitalize(), 
-                          wx.OK | wx.ICON_ERROR, self.GetParent())
-            return False
+        if self.fileBtn.GetValue() and self.filename not in self.validFiles:
+            if not os.path.isfile(self.filename):
+                msg = ("The specified %s file could not be found!\n\nFilename: '%s'"
+                       % (self.type, self.filename))
+                wx.MessageBox(msg, "%s File Not Found" % self.type.capitalize(), 
+                              wx.OK | wx.ICON_ERROR, self.GetParent())
+                return False
+            self.validFiles.add(self.filename)
         
         # FUTURE: Additional validation (correct MCU type, maybe)
         return True
@@ -1751,19 +1961,25 @@ class FirmwareWidget(SC.SizedPanel):
                 * Selected filename (string)
         """
         self.new = False
-        self.filename = self.fileField.GetValue().strip()
+        if self.fileField is not None:
+            self.filename = self.fileField.GetValue().strip()
 
         if self.newBtn.GetValue():
             idx = self.newField.GetSelection()
             if idx > -1:
                 self.new = True
-                self.rev = list(self.choices.keys())[idx]
+                self.rev = self.revs[idx]
         elif self.fileBtn.GetValue():
             f = self.fileField.GetValue().strip()
             if f:
-                if f in self.history:
-                    self.history.remove(f)
-                self.history.insert(0, f)
+                # Move to the front of the history (if not already there).
+                # Modified in place; it's the list in the app's prefs.
+                if not self.history or self.history[0] != f:
+                    try:
+                        self.history.remove(f)
+                    except ValueError:
+                        pass
+                    self.history.insert(0, f)
                 self.new = True
                 self.filename = f
 
@@ -1774,13 +1990,17 @@ class FirmwareWidget(SC.SizedPanel):
         """
         """
         self.filename = evt.GetString()
+        self.validFiles.discard(self.filename)
 
 
     def OnRadioButton(self, evt):
         """ Handle any radio button selection.
         """
         rb = evt.GetEventObject()
-        self.fileField.Enable(rb == self.fileBtn)
+        if rb == self.fileBtn:
+            self._ensureFileField()
+        if self.fileField is not None:
+            self.fileField.Enable(rb == self.fileBtn)
         self.newField.Enable(rb == self.newBtn)
 
         
@@ -1898,12 +2118,39 @@ class FinalPage(TitledPage):
     """
     DEFAULT_TITLE = "Final Page"
 
+    # Enclosure type names, keyed by type. Never changes.
+    ENCLOSURE_NAMES = dict(models.Device.ENCLOSURE_TYPES)
+
+    # Checkboxes (attribute names) and the wizard attributes they set
+    CHECK_BINDINGS = (('dirsCheck', 'makeDirs'),
+                      ('copyCheck', 'copyContent'),
+                      ('updateDbCheck', 'doDatabaseUpdate'),
+                      ('doBirthCheck', 'doBirth'),
+                      ('keepCalCheck', 'keepOldCal'),
+                      ('configCheck', 'configDevice'))
+
+    # Warnings shown when leaving the page with "Write device Manifest"
+    # and/or "Update the Database" unchecked, indexed by the checkboxes'
+    # states (manifest bit 0, database bit 1)
+    CONFIRM_MESSAGES = (('"Update the Database" and "Write to Manifest" are '
+                         'both unselected!\n\n'
+                         "Neither the device's manifest nor the database will "
+                         "be updated. Only the firmware and/or bootloader will "
+                         "be uploaded (if selected on the previous page)."),
+                        ('"Update the Database" not selected!\n\n'
+                         "The device will get birthed, but no record kept."),
+                        ('"Write to Manifest" not selected!\n\n'
+                         'The database will be updated, but the device will '
+                         'keep its existing Manifest, unmodified.'))
+
     
     def __init__(self, parent, title=None):
         self.editedName = False
         self.volumeName = ""
         self.editedSku = False
         self.sku = ""
+        self._uiBuilt = False
+        self.configFiles = None
         TitledPage.__init__(self, parent, title=title)
 
 
@@ -1933,8 +2180,10 @@ class FinalPage(TitledPage):
             if not self.volumeName:
                 self.volumeName = self.data.getVolumeName()
 
-        self.configFiles = self.app.configs[:]
-        self.configNames = [os.path.basename(f) for f in self.configFiles]
+        # The app's config files are found once, at startup
+        if self.configFiles != self.app.configs:
+            self.configFiles = self.app.configs[:]
+            self.configNames = [os.path.basename(f) for f in self.configFiles]
 
         self.chainPrint = self.app.prefs.get('chainPrint', True)
 
@@ -1948,12 +2197,8 @@ class FinalPage(TitledPage):
         self.volumeName = self.volNameField.GetValue().strip()
         self.data.volumeName = self.volumeName
         self.data.sku = self.skuField.GetValue()
-        parent.makeDirs = self.dirsCheck.GetValue()
-        parent.copyContent = self.copyCheck.GetValue()
-        parent.doDatabaseUpdate = self.updateDbCheck.GetValue()
-        parent.doBirth = self.doBirthCheck.GetValue()
-        parent.keepOldCal = self.keepCalCheck.GetValue()
-        parent.configDevice = self.configCheck.GetValue()
+        for check, attr in self.CHECK_BINDINGS:
+            setattr(parent, attr, getattr(self, check).GetValue())
         parent.printLabel = self.printCheck.GetValue()
 
         self.app.prefs['chainPrint'] = self.chainPrintCheck.GetValue()
@@ -1962,7 +2207,35 @@ class FinalPage(TitledPage):
         
  
     def buildUI(self):
-        """ Construct the GUI.
+        """ Construct the GUI. The final page is only seen at the very end,
+            so the actual construction is deferred until it is first shown
+            (see `ensureBuilt()`).
+        """
+        pass
+
+
+    def ensureBuilt(self):
+        """ Construct the GUI, if it hasn't been already.
+        """
+        if self._uiBuilt:
+            return
+        
+        self.Freeze()
+        try:
+            self._realBuildUI()
+            self._uiBuilt = True
+
+            hasOldCal = findOldCal(self.data.chipId) is not None
+            self.keepCalCheck.Show(hasOldCal)
+            self.keepCalCheck.SetValue(hasOldCal)
+            self.copyConfigField.Enable(False)
+            self.Layout()
+        finally:
+            self.Thaw()
+
+
+    def _realBuildUI(self):
+        """ Actually construct the GUI. Called by `ensureBuilt()`.
         """
         parent = self.GetParent()
         
@@ -1980,22 +2253,23 @@ class FinalPage(TitledPage):
         label = wx.StaticText(namepane, -1, 'Disk Volume Name:')
         label.SetSizerProps(valign="center")
         label.SetToolTip(tts)
-        self.volNameField = wx.TextCtrl(namepane, -1, self.data.getVolumeName())
+        self.volNameField = wx.TextCtrl(namepane, -1, "")
         self.volNameField.SetSizerProps(valign="center", expand=True)
         self.volNameField.SetToolTip(tts)
         self.volNameField.Bind(wx.EVT_CHAR, self.OnNameCharacter)
-        self.sizer.Add(namepane, 0, wx.EXPAND | wx.EAST | wx.WEST, 16)
         
         checkPanel = wx.Panel(self, -1)
         checkSizer = wx.BoxSizer(wx.VERTICAL)
         checkPanel.SetSizer(checkSizer)
         
-        # Convenience function for adding checkboxes. Saves several lines.
+        # Convenience function for creating checkboxes. Saves several lines.
+        # They all get added to the sizer at once, afterwards.
+        checks = []
         def _cb(label, val, tooltip):
             check = wx.CheckBox(checkPanel, -1, label)
             check.SetValue(val)
             check.SetToolTip(tooltip)
-            checkSizer.Add(check, 1, wx.EXPAND | wx.ALL, 2)
+            checks.append((check, 1, wx.EXPAND | wx.ALL, 2))
             return check
         
         self.dirsCheck = _cb("Create content directories", parent.makeDirs,
@@ -2017,8 +2291,8 @@ class FinalPage(TitledPage):
                      "Write birth data to the device. "
                      "Should almost always be checked!")
 
-        checkSizer.Add(wx.StaticText(self, -1, ""), 0)        
-        self.sizer.Add(checkPanel, 0, wx.EXPAND | wx.EAST | wx.WEST, 16)
+        checks.append((wx.StaticText(self, -1, ""), 0))
+        checkSizer.AddMany(checks)
         
         configpane = SC.SizedPanel(self, -1)
         configpane.SetSizerType("form")
@@ -2042,59 +2316,74 @@ class FinalPage(TitledPage):
         self.copyConfigCheck.Bind(wx.EVT_CHECKBOX, self.OnCopyConfigCheck)
         if self.configNames:
             self.copyConfigField.SetSelection(0)
-        self.sizer.Add(configpane, 0, wx.EXPAND | wx.EAST | wx.WEST, 16)
 
-        hasOldCal =  legacy.findOldCal(self.data.chipId) is not None
-        self.keepCalCheck.Show(hasOldCal)
-        self.keepCalCheck.SetValue(hasOldCal)
-        self.copyConfigField.Enable(False)
+        flags = wx.EXPAND | wx.EAST | wx.WEST
+        self.sizer.AddMany(((namepane, 0, flags, 16),
+                            (checkPanel, 0, flags, 16),
+                            (configpane, 0, flags, 16)))
         
  
  
     def populate(self):
         """ Fill out the UI with (current) data from the parent.
         """
-        encName = dict(models.Device.ENCLOSURE_TYPES).get(self.data.enclosure)
-        self.summary.SetValue('')
-        self.print("Final page")
-        self.print("This text is temporary. Contents will change.")
-        self.print("-"*40)
-        self.print("self.data.example: %r" % self.data.example)
-        self.print("self.data.birth: %r" % self.data.birth)
-        self.print("self.data.device: %r" % self.data.device)
-        self.print("self.data.getSensors: {}".format(self.data.getSensors()))
-        self.print("self.data.sensorSerials: {}".format(self.data.sensorSerials))
-        if self.data.lastDevice is not None:
-            sensUnchanged, sens = self.data.lastDevice.compareSensors(self.data.device)
-            if not sensUnchanged:
-                self.print(" Changed sensors:\n%s" % pprint.pformat(sens, 4))
-            else:
-                self.print(" Sensor loadout unchanged")
-        self.print("-"*40)
-        self.print("self.data.newFirmware: %r" % (self.data.newFirmware))
-        self.print("self.data.fwRev: %r" % (self.data.fwRev))
-        self.print("self.data.firmware: %r" % (self.data.firmware))
-        self.print("self.data.actualFwRev: %r" % (self.data.actualFwRev))
-        self.print("self.data.newBootloader: %r" % (self.data.newBootloader))
-        self.print("self.data.bootRev: %r" % (self.data.bootRev))
-        self.print("self.data.bootloader: %r" % (self.data.bootloader))
-        self.print("self.data.actualBootRev: %r" % (self.data.actualBootRev))
-        self.print("self.data.enclosure: %r (%r)" % (encName, self.data.enclosure))
-        self.print("self.data.capacity: %r" % (self.data.capacity))
-
-        self.volNameField.SetValue(self.volumeName)
+        # Suspend repainting until everything has been updated
+        self.Freeze()
+        try:
+            data = self.data
+            encName = self.ENCLOSURE_NAMES.get(data.enclosure)
+            lines = ["Final page",
+                     "This text is temporary. Contents will change.",
+                     "-"*40,
+                     f"self.data.example: {data.example!r}",
+                     f"self.data.birth: {data.birth!r}",
+                     f"self.data.device: {data.device!r}",
+                     f"self.data.getSensors: {data.getSensors()}",
+                     f"self.data.sensorSerials: {data.sensorSerials}"]
+            if data.lastDevice is not None:
+                sensUnchanged, sens = data.compareSensors(data.lastDevice, data.device)
+                if not sensUnchanged:
+                    # One (old, new) pair per line; no need for pprint
+                    lines.append(" Changed sensors:")
+                    lines.extend("    %r -> %r" % p for p in sens)
+                else:
+                    lines.append(" Sensor loadout unchanged")
+            lines.extend(("-"*40,
+                          f"self.data.newFirmware: {data.newFirmware!r}",
+                          f"self.data.fwRev: {data.fwRev!r}",
+                          f"self.data.firmware: {data.firmware!r}",
+                          f"self.data.actualFwRev: {data.actualFwRev!r}",
+                          f"self.data.newBootloader: {data.newBootloader!r}",
+                          f"self.data.bootRev: {data.bootRev!r}",
+                          f"self.data.bootloader: {data.bootloader!r}",
+                          f"self.data.actualBootRev: {data.actualBootRev!r}",
+                          f"self.data.enclosure: {encName!r} ({data.enclosure!r})",
+                          f"self.data.capacity: {data.capacity!r}",
+                          ""))
+            self.summary.ChangeValue('\n'.join(lines))
+
+            self.volNameField.ChangeValue(self.volumeName)
+
+            parent = self.GetParent()
+            for check, attr in self.CHECK_BINDINGS:
+                getattr(self, check).SetValue(getattr(parent, attr))
+        
+            self.printCheck.SetValue(self.printLabel)
+            self.chainPrintCheck.SetValue(self.chainPrint)
+            self.chainPrintCheck.Enable(self.printLabel)
+            self.skuField.Enable(self.printLabel)
+        finally:
+            self.Thaw()
 
-        parent = self.GetParent()
-        self.updateDbCheck.SetValue(parent.doDatabaseUpdate)
-        self.doBirthCheck.SetValue(parent.doBirth)
-        self.keepCalCheck.SetValue(parent.keepOldCal)
-        self.configCheck.SetValue(parent.configDevice)
-        self.copyCheck.SetValue(parent.copyContent)
-        
-        self.printCheck.SetValue(self.printLabel)
-        self.chainPrintCheck.SetValue(self.chainPrint)
-        self.chainPrintCheck.Enable(self.printLabel)
-        self.skuField.Enable(self.printLabel)
+
+    def OnPageShown(self, evt):
+        """ Event handler called when a page is shown. Builds the GUI (on the
+            first visit) and updates the widgets.
+        """
+        if evt.GetDirection():
+            self.getData()
+            self.ensureBuilt()
+            self.populate()
 
 
     def OnSetConfigCheck(self, _evt):
@@ -2126,14 +2415,18 @@ class FinalPage(TitledPage):
     def OnNameCharacter(self, evt):
         kc = evt.GetKeyCode()
         if 31 < kc < 127:
+            # Once edited, the keystrokes no longer need handling
             self.editedName = True
+            self.volNameField.Unbind(wx.EVT_CHAR, handler=self.OnNameCharacter)
         evt.Skip()
 
 
     def OnSkuCharacter(self, evt):
         kc = evt.GetKeyCode()
         if 31 < kc < 127:
+            # Once edited, the keystrokes no longer need handling
             self.editedSku = True
+            self.skuField.Unbind(wx.EVT_CHAR, handler=self.OnSkuCharacter)
         evt.Skip()
 
 
@@ -2155,22 +2448,12 @@ class FinalPage(TitledPage):
             return
 
         # Make sure user meant to use weird options.
-        checks = ((self.doBirthCheck.GetValue()) |
-                  (self.updateDbCheck.GetValue() << 1))
+        doBirth = self.doBirthCheck.GetValue()
+        doUpdate = self.updateDbCheck.GetValue()
                 
-        if checks != 3:
-            msg = (('"Update the Database" and "Write to Manifest" are both '
-                    'unselected!\n\n'
-                    "Neither the device's manifest nor the database will be "
-                    "updated. Only the firmware and/or bootloader will be "
-                    "uploaded (if selected on the previous page)."),
-                   ('"Update the Database" not selected!\n\n'
-                    "The device will get birthed, but no record kept."),
-                   ('"Write to Manifest" not selected!\n\n'
-                    'The database will be updated, but the device will keep '
-                    'its existing Manifest, unmodified.'))
-            
-            m = msg[checks] + "\n\nAre you sure you want to continue?"
+        if not (doBirth and doUpdate):
+            m = (self.CONFIRM_MESSAGES[doBirth + 2 * doUpdate]
+                 + "\n\nAre you sure you want to continue?")
             q = wx.MessageBox(m, "Confirmation", 
                               wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING,
                               self.GetParent())
@@ -2196,6 +2479,10 @@ class BirthWizard(wx.adv.Wizard):
         the real work.
     """
 
+    # These get filled in (as class variables) by __init__()
+    WIZARD_BITMAP = None
+    WIZARD_BG = None
+
     def __init__(self, data, title="Birther Wizard"):
         """ Constructor.
         
@@ -2220,11 +2507,17 @@ class BirthWizard(wx.adv.Wizard):
         
         self.showSerialsPage = True
         
-        img = wx.Image(os.path.join(paths.RESOURCES_PATH, 'birthomatic.png'), wx.BITMAP_TYPE_PNG)
-        bg = wx.Colour(img.GetRed(1, 1), img.GetGreen(1, 1), img.GetBlue(1, 1))
-        super(BirthWizard, self).__init__(None, -1, title, img.ConvertToBitmap())
+        if BirthWizard.WIZARD_BITMAP is None:
+            img = wx.Image(os.path.join(paths.RESOURCES_PATH, 'birthomatic.png'), wx.BITMAP_TYPE_PNG)
+            # Background color is that of pixel (1, 1); read it in one call.
+            # GetDataBuffer() doesn't copy the image data, unlike GetData().
+            offset = (img.GetWidth() + 1) * 3
+            BirthWizard.WIZARD_BG = wx.Colour(*img.GetDataBuffer()[offset:offset+3])
+            BirthWizard.WIZARD_BITMAP = img.ConvertToBitmap()
+
+        super(BirthWizard, self).__init__(None, -1, title, BirthWizard.WIZARD_BITMAP)
         self.SetBitmapPlacement(wx.adv.WIZARD_VALIGN_BOTTOM)
-        self.SetBitmapBackgroundColour(bg)
+        self.SetBitmapBackgroundColour(BirthWizard.WIZARD_BG)
 
         oldCursor = self.GetCursor()
         wx.SetCursor(wx.Cursor(wx.CURSOR_WAIT))
@@ -2250,12 +2543,9 @@ class BirthWizard(wx.adv.Wizard):
         self.firstPage = pages[0]
         self.lastPage = pages[-1]
         
-        prev = None
-        for p in pages:
-            if prev is not None:
-                prev.SetNext(p)
-                p.SetPrev(prev)
-            prev = p
+        for prev, p in zip(pages, pages[1:]):
+            prev.SetNext(p)
+            p.SetPrev(prev)
 
         self.GetPageAreaSizer().Add(self.pages[0])
 
@@ -2289,6 +2579,28 @@ class BirthWizard(wx.adv.Wizard):
 class BirthData(object):
     """ Class for keeping all of the information collected for a device birth.
     """
+
+    __slots__ = ('chipId', 'customized', 'mcu', 'fullMcu', 'rebirth', 'sku',
+                 'resetCreationDate', 'actualBootRev', 'actualFwRev',
+                 'device', 'lastDevice', 'batchId', 'orderId', 'battery',
+                 'hwType', 'hwCustomStr', 'enclosure', 'capacity',
+                 'deviceNotes', 'birth', 'lastBirth', 'serialNumber',
+                 'newSerialNumber', 'birthNotes', 'newFirmware', 'firmware',
+                 'lastFirmware', 'fwRev', 'lastFwRev', 'newBootloader',
+                 'bootloader', 'lastBootloader', 'bootRev', 'lastBootRev',
+                 'example', 'lastExample', 'digitalSensors', 'analogSensors',
+                 'sensorSerials', 'sensorDiffs', 'volumeName')
+
+    # MCU short names (as used in the DB) and full names, keyed by short name,
+    # and full MCU name prefixes. See `__init__()`.
+    MCU_NAMES = {"GG": ("GG", "EFM32GG330"),
+                 "GG11": ("GG11", "EFM32GG11"),
+                 "STM32": ("STM32", "STM32U585AII6")}
+    MCU_PREFIXES = tuple((names[1], names) for names in MCU_NAMES.values())
+
+    # `Device` fields modified by `_updateDatabase()` itself
+    DEVICE_UPDATE_FIELDS = ('batch', 'battery', 'hwType', 'hwCustomStr',
+                            'capacity', 'enclosure', 'created')
     
     def __init__(self, chipId=None, bootRev=None, fwRev=None, mcu="EFM32GG330",
                  exampleId=None, batchId="", orderId="", customized=False,
@@ -2316,21 +2628,15 @@ class BirthData(object):
         self.chipId = chipId
         self.customized = customized
         
-        self.mcu = self.fullMcu = mcu = (mcu or "EFM32GG330").upper()
+        mcu = (mcu or "EFM32GG330").upper()
         
         # TODO: Modify DB to use the whole MCU name, instead of GG/GG11
         #  Converting back and forth is kind of messy.
-        if "GG" in mcu:
-            if mcu.startswith("EFM32GG330") or mcu == "GG":
-                self.mcu = "GG"
-                self.fullMcu = "EFM32GG330"
-            elif mcu.startswith("EFM32GG11") or mcu == "GG11":
-                self.mcu = "GG11"
-                self.fullMcu = "EFM32GG11"
-        elif "STM" in mcu:
-            if mcu.startswith("STM32U585AII6") or mcu == "STM32":
-                self.mcu = "STM32"
-                self.fullMcu = "STM32U585AII6"
+        names = self.MCU_NAMES.get(mcu)
+        if names is None:
+            names = next((n for p, n in self.MCU_PREFIXES if mcu.startswith(p)),
+                         (mcu, mcu))
+        self.mcu, self.fullMcu = names
         
         self.rebirth = False
         self.sku = None
@@ -2391,6 +2697,9 @@ class BirthData(object):
         # to an Example's sensor!
         self.sensorSerials = {} 
 
+        # Cached results of `compareSensors()`.
+        self.sensorDiffs = {}
+
         self.volumeName = ""
 
         self.setDevice(models.Device.objects.filter(chipId=self.chipId).last())
@@ -2477,7 +2786,7 @@ class BirthData(object):
         dev = dev or self.device
         if dev is None:
             return []
-        return [s.info.id for s in dev.getSensors(analog=False)]
+        return [s.info_id for s in dev.getSensors(analog=False)]
 
 
     def getSensors(self):
@@ -2485,7 +2794,8 @@ class BirthData(object):
             analog ones). Note: modifies `sensorSerial` in place!
         """
         if self.lastDevice is not None:
-            _diff, sensors = self.lastDevice.compareSensors(self.device, info__hasSerialNumber=True)
+            _diff, sensors = self.compareSensors(self.lastDevice, self.device,
+                                                 info__hasSerialNumber=True)
         elif self.device is not None:
             sensors = [(None, s) for s in self.device.getSensors(info__hasSerialNumber=True)]
         else:
@@ -2507,6 +2817,25 @@ class BirthData(object):
         return result
 
 
+    def compareSensors(self, device, other, **kwargs):
+        """ Compare the sensors of two devices; see `Device.compareSensors()`.
+            The same comparisons get made repeatedly (by `getSensors()`, the
+            wizard's final page, `updateSensors()`), so the results are cached
+            until the database is updated.
+            
+            @param device: The first `Device`.
+            @param other: The `Device` with which to compare.
+            @return: A tuple containing a Boolean (whether or not the two
+                devices have matching sensors) and a list of tuples pairing
+                the first `Device`'s sensors with the other's.
+        """
+        key = (device.pk, other.pk, frozenset(kwargs.items()))
+        result = self.sensorDiffs.get(key)
+        if result is None:
+            result = self.sensorDiffs[key] = device.compareSensors(other, **kwargs)
+        return result
+
+
     def getVolumeName(self):
         """ Get the default drive volume name for the device type.
         """
@@ -2531,20 +2860,45 @@ class BirthData(object):
 
     def updateDatabase(self):
         """ Do the actual work of creating a new `Birth` record from the
-            current data, creating/modifying the `Device` if needed.
+            current data, creating/modifying the `Device` if needed. The
+            records are all written in one transaction; if anything fails,
+            none of the changes are kept.
+        """
+        if self.newSerialNumber:
+            # Done outside of the transaction, so other birthers don't wait
+            # on (or read a stale) last serial number until it's committed.
+            self.serialNumber = models.newSerialNumber("SlamStick")
+            logger.info('Generated new serial number: %s' % self.serialNumber)
+
+        success = False
+        try:
+            with transaction.atomic():
+                newBirth = self._updateDatabase()
+            success = True
+            return newBirth
+
+        finally:
+            if not success:
+                # Any new `Batch` got rolled back, too. Cached sensors may
+                # have been modified before the rollback.
+                getBatch.cache_clear()
+                self.sensorDiffs.clear()
+                if self.newSerialNumber:
+                    logger.error('Something bad happened, resetting SN %s' %
+                                 self.serialNumber)
+                    if models.revertSerialNumber(self.serialNumber):
+                        logger.info('Successfully reverted serial number.')
+                    else:
+                        logger.info('Failed to revert serial number.')
+
+
+    def _updateDatabase(self):
+        """ Create the new `Birth` and modify the `Device`. Called by
+            `updateDatabase()`, within a transaction.
         """
         now = timezone.now()
         
-        if self.batchId:
-            try:
-                batch, created = models.Batch.objects.get_or_create(batchId=self.batchId)
-                if created:
-                    logger.info('Created Batch, ID %r' % self.batchId)
-            except models.Batch.MultipleObjectsReturned:
-                logger.error('More than one Batch with ID %r exists; using last!')
-                batch = models.Batch.objects.filter(batchId=self.batchId).last()
-        else:
-            batch = None
+        batch = getBatch(self.batchId) if self.batchId else None
             
         if not self.rebirth:
             # SCENARIO 1: New device (first time birth). Duplicate the selected
@@ -2559,9 +2913,7 @@ class BirthData(object):
             # SCENARIO 2: Rebirth, with no changes to the device type.
             logger.info('Rebirth: unmodified device')
             newDevice = self.device
-            if batch != newDevice.batch:
-                newDevice.batch = batch
-                newDevice.save()
+            newDevice.batch = batch
         else:
             # SCENARIO 3: Rebirth, as different product. Update the device.
             # The device's sensors are not modified here; that is done in
@@ -2581,57 +2933,44 @@ class BirthData(object):
 
         newDevice.capacity = self.capacity
         newDevice.enclosure = self.enclosure
-        newDevice.save()
         
         if not self.newBootloader:
             self.bootRev = self.actualBootRev or self.bootRev
-        
-        if self.newSerialNumber:
-            self.serialNumber = models.newSerialNumber("SlamStick")
-            logger.info('Generated new serial number: %s' % self.serialNumber)
-
-        success = False
-        try:
-            logger.info('Copying birth: %s' % self.birth)
-
-            newBirth = self.birth.copy(user=USER,
-                                       device=newDevice, 
-                                       serialNumber=self.serialNumber,
-                                       rebirth=self.rebirth,
-                                       date=now,
-                                       birtherVersion=__version__,
-                                       firmware=self.firmware,
-                                       fwRev=self.fwRev,
-                                       bootloader=self.bootloader,
-                                       bootRev=self.bootRev,
-                                       sku=self.sku or self.birth.partNumber,
-                                       notes=self.birthNotes,
-                                       test=TEST_BIRTH,
-                                       completed=False)
-            
-            self.updateSensors(newDevice)
-    
-            # Set all the local data for the new birth. Necessary?
-            self.setBirth(newBirth)
-            self.setDevice(newDevice)
-            self.rebirth = True
-
-            if self.resetCreationDate:
-                logger.info(f'Resetting device creation date to {newBirth.date.date()}')
-                newDevice.created = newBirth.date
-                newDevice.save()
 
-            success = True
-            return newBirth
-        
-        finally:
-            if not success and self.newSerialNumber:
-                logger.error('Something bad happened, resetting SN %s' %
-                             self.serialNumber)
-                if models.revertSerialNumber(self.serialNumber):
-                    logger.info('Successfully reverted serial number.')
-                else:
-                    logger.info('Failed to revert serial number.')
+        logger.info('Copying birth: %s' % self.birth)
+
+        newBirth = self.birth.copy(user=USER,
+                                   device=newDevice, 
+                                   serialNumber=self.serialNumber,
+                                   rebirth=self.rebirth,
+                                   date=now,
+                                   birtherVersion=__version__,
+                                   firmware=self.firmware,
+                                   fwRev=self.fwRev,
+                                   bootloader=self.bootloader,
+                                   bootRev=self.bootRev,
+                                   sku=self.sku or self.birth.partNumber,
+                                   notes=self.birthNotes,
+                                   test=TEST_BIRTH,
+                                   completed=False)
+        
+        self.updateSensors(newDevice)
+        self.sensorDiffs.clear()
+
+        if self.resetCreationDate:
+            logger.info(f'Resetting device creation date to {newBirth.date.date()}')
+            newDevice.created = newBirth.date
+
+        # All of the changes to the device, saved at once. Only the fields
+        # possibly set here; `copy()` and `copyFrom()` save the rest.
+        newDevice.save(update_fields=self.DEVICE_UPDATE_FIELDS)
+
+        # Set all the local data for the new birth. Necessary?
+        self.setBirth(newBirth)
+        self.setDevice(newDevice)
+        self.rebirth = True
+
+        return newBirth
                 
     
     def updateSensors(self, device):
@@ -2645,8 +2984,10 @@ class BirthData(object):
         """
         if not self.rebirth:
             # SCENARIO 1: New device with new sensors. `self.device` is the
-            # device from the selected example.
-            for s in self.device.getSensors():
+            # device from the selected example. Its sensors' channels (copied
+            # by `Sensor.copy()`) are fetched with one query, not one each.
+            sensors = self.device.getSensors().prefetch_related('sensorchannel_set')
+            for s in sensors:
                 sn = self.sensorSerials.get(s.id, '')
                 s.copy(device=device, serialNumber=sn)
             return
@@ -2655,19 +2996,23 @@ class BirthData(object):
             # SCENARIO 2: Rebirth, with no change to the device type. Just
             # update the serial numbers (as necessary). `self.device` is the
             # same as `self.lastDevice`.
+            changed = []
             for s in device.getSensors(info__hasSerialNumber=True):
                 sn = self.sensorSerials.get(s.id, '')
                 if sn != s.serialNumber:
                     s.serialNumber = sn
-                    s.save()
+                    changed.append(s)
+            if changed:
+                models.Sensor.objects.bulk_update(changed, ['serialNumber'])
             return
         
         # SCENARIO 3: Rebirth, with sensors that differ from what exists in 
         # the database for the `Device`. `self.device` is the device from the
         # selected example.
-        _diff, sensors = device.compareSensors(self.device)
+        _diff, sensors = self.compareSensors(device, self.device)
         
         deletedSensors = []
+        changed = []
         
         for lastSens, newSens in sensors:
             if newSens is None:
@@ -2685,8 +3030,10 @@ class BirthData(object):
                 sn = self.sensorSerials.get(lastSens.id, '')
                 if sn != lastSens.serialNumber:
                     lastSens.serialNumber = sn
-                    lastSens.save()
+                    changed.append(lastSens)
 
+        if changed:
+            models.Sensor.objects.bulk_update(changed, ['serialNumber'])
         self.deleteSensors(*deletedSensors)
     
     
@@ -2710,23 +3057,20 @@ class BirthData(object):
             # attached to. Sensors with `device==None` can be gathered and
             # deleted later. 
             logger.debug("deleteSensors(): Doing safe 'delete'")
+            changed = []
             for s in sensors:
-                if s.device:
-                    s.notes += "(deleted from device %s)" % s.device.pk
+                # Note: uses `device_id` to avoid fetching each `Device`
+                if s.device_id is not None:
+                    s.notes += "(deleted from device %s)" % s.device_id
                     s.device = None
-                    s.save()
+                    changed.append(s)
+            if changed:
+                models.Sensor.objects.bulk_update(changed, ['notes', 'device'])
         else:        
             # "Real" delete. Actually does the deletion, which is reversible
             # and not necessarily safe during development.
             logger.debug("deleteSensors(): Doing real delete")
-            
-            # For deleting multiple sensors: build out a 'Q' object that will 
-            # "OR" together all the record primary keys (a/k/a/ `id`), to be 
-            # used to create a QuerySet for deletion.
-            q = Q(pk=sensors[0].pk)
-            for s in sensors[1:]:
-                q |= Q(pk=s.pk)
-            models.Sensor.objects.filter(q).delete()
+            models.Sensor.objects.filter(pk__in=[s.pk for s in sensors]).delete()
     
                 
 #===============================================================================
@@ -2771,6 +3115,11 @@ class BirtherApp(wx.App):
     def OnInit(self):
         """ Post-Constructor initialization event handler.
         """
+        # Nothing in the birther uses EVT_UPDATE_UI; don't send it to every
+        # widget on every idle cycle.
+        wx.UpdateUIEvent.SetMode(wx.UPDATE_UI_PROCESS_SPECIFIED)
+        wx.UpdateUIEvent.SetUpdateInterval(250)
+        
         self.prefsFile = os.path.join(os.path.dirname(__file__),
                                       self.PREFS_FILE)
         self.loadPrefs()
@@ -2890,12 +3239,15 @@ class BirtherApp(wx.App):
         self.prefs.setdefault('bootloaderHistory', [])
         
         self.origPrefs = self.copyPrefs(self.prefs)
+        self.capacities = None
         
     
     def savePrefs(self):
         """ Save the preferences file. A backup of the previous file will be
             created if the preferences have changed.
         """
+        self.capacities = None
+        
         try:
             if self.prefs != self.origPrefs:
                 makeBackup(self.prefsFile)
@@ -2915,6 +3267,16 @@ class BirtherApp(wx.App):
             logger.error("Failed to restore backup of prefs file!")
 
 
+    def getCapacities(self):
+        """ Get the storage capacities from the preferences, as strings for
+            use in a drop-down list. Cached until the preferences are next
+            loaded or saved.
+        """
+        if self.capacities is None:
+            self.capacities = [str(c) for c in self.prefs.get('capacities', [])]
+        return self.capacities
+
+
     @classmethod
     def reconnect(cls):
         """ Test the database connection; disconnect if timed out, to force a
@@ -3724,7 +4086,7 @@ class BirtherApp(wx.App):
                 if keepCal:
                     # NOTE: existing data *should* exist if the keepCal is True!
                     pd.Update(step, "Reading existing calibration data...")
-                    caldata = readFile(legacy.findOldCal(chipId))
+                    caldata = readFile(findOldCal(chipId))
                 else:
                     pd.Update(step, "Generating default calibration data...")
                     caldata = ct.dumpEBML()
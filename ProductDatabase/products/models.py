@@ -773,7 +773,9 @@ class Device(models.Model):
             :returns: a `QuerySet` with the Device's sensors.
         """
         # FUTURE: Cache this, clear cache if Sensor table altered
-        sens = self.sensor_set.all().extra(order_by=['sensorId'])
+        # `info` is used by nearly everything that gets sensors; fetch it in
+        # the same query.
+        sens = self.sensor_set.select_related('info').extra(order_by=['sensorId'])
 
         if analog == digital:
             return sens.filter(**kwargs)